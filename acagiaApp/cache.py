@@ -0,0 +1,120 @@
+# ----------------------------------------------------------------------
+# Name:        cache
+# Purpose:     Caches per-academy dashboard information
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Caches dashboard information and the check-in kiosk's roster per academy
+and local date.
+Cached entries are invalidated by bumping the academy's version whenever
+its members, attendance records or ranks change (dashboard), or its
+members or courses change (kiosk).
+Works with any Django cache backend (e.g. local-memory, file-based).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+import time
+
+# Seconds to keep a dashboard in the cache
+DASHBOARD_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60 * 60)
+# Seconds to keep a kiosk roster in the cache
+KIOSK_TIMEOUT = getattr(settings, 'KIOSK_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def get_version(aca_id, name='dashboard'):
+    """
+    Gets the academy's current version of cached entries.
+    :param aca_id: academy id
+    :param name: name of cached entries ('dashboard' or 'kiosk')
+    :return: version number
+    """
+    key = f'{name}_version:{aca_id}'
+    version = cache.get(key)
+    if version is None:
+        # Start from the current time so that an evicted version never
+        # points back to entries cached before the eviction.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+def dashboard_key(aca_id, day):
+    """
+    Makes a cache key for the academy's dashboard on the given date.
+    :param aca_id: academy id
+    :param day: academy's local date
+    :return: cache key
+    """
+    return f'dashboard:{aca_id}:{get_version(aca_id)}:{day.isoformat()}'
+
+def get_dashboard(aca_id, day):
+    """
+    Gets cached dashboard information.
+    :param aca_id: academy id
+    :param day: academy's local date
+    :return: (dictionary) dashboard information if cached, otherwise, None
+    """
+    return cache.get(dashboard_key(aca_id, day))
+
+def set_dashboard(aca_id, day, data):
+    """
+    Caches dashboard information.
+    :param aca_id: academy id
+    :param day: academy's local date
+    :param data: (dictionary) dashboard information
+    """
+    cache.set(dashboard_key(aca_id, day), data, DASHBOARD_TIMEOUT)
+
+def invalidate_dashboard(aca_id):
+    """
+    Invalidates all cached dashboards of the academy.
+    :param aca_id: academy id
+    """
+    bump_version(aca_id, 'dashboard')
+
+def kiosk_key(aca_id, day):
+    """
+    Makes a cache key for the academy's kiosk roster on the given date.
+    :param aca_id: academy id
+    :param day: academy's local date
+    :return: cache key
+    """
+    return f'kiosk:{aca_id}:{get_version(aca_id, "kiosk")}:{day.isoformat()}'
+
+def get_kiosk(aca_id, day):
+    """
+    Gets a cached kiosk roster.
+    :param aca_id: academy id
+    :param day: academy's local date
+    :return: (dictionary) kiosk roster if cached, otherwise, None
+    """
+    return cache.get(kiosk_key(aca_id, day))
+
+def set_kiosk(aca_id, day, data):
+    """
+    Caches a kiosk roster.
+    :param aca_id: academy id
+    :param day: academy's local date
+    :param data: (dictionary) kiosk roster
+    """
+    cache.set(kiosk_key(aca_id, day), data, KIOSK_TIMEOUT)
+
+def invalidate_kiosk(aca_id):
+    """
+    Invalidates all cached kiosk rosters of the academy.
+    :param aca_id: academy id
+    """
+    bump_version(aca_id, 'kiosk')
+
+def bump_version(aca_id, name):
+    """
+    Bumps the academy's version of cached entries.
+    :param aca_id: academy id
+    :param name: name of cached entries ('dashboard' or 'kiosk')
+    """
+    key = f'{name}_version:{aca_id}'
+    try:
+        cache.incr(key)
+    except ValueError: # Version isn't cached, so nothing to invalidate
+        pass
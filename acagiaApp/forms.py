@@ -4,6 +4,29 @@ from .models import Academy, Member, Course, Attendance, Rank, MemberRank, \
     Event, PaymentTerm, MemberPayment
 from django.forms.widgets import TextInput, Select, EmailInput, DateInput, \
     TimeInput, SplitDateTimeWidget, DateTimeInput, NumberInput
+from django.urls import reverse_lazy
+from django.utils import timezone
+
+class MemberSearchSelect(Select):
+    """
+    Select box for a member that only renders the selected member.
+    Other members are loaded from the member search as the user types,
+    so the page doesn't embed the whole roster.
+    """
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.attrs.setdefault('class', 'member-search')
+        self.attrs.setdefault('data-search-url', reverse_lazy('mem_search'))
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if str(v).isdigit()]
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        if selected:
+            members = self.choices.queryset.filter(pk__in=selected)
+            for index, member in enumerate(members, 1):
+                options.append(self.create_option(name, member.pk,
+                                                  str(member), True, index))
+        return [(None, options, 0)]
 
 class AcademyForm(forms.ModelForm):
     class Meta:
@@ -65,6 +88,23 @@ class MemberForm(forms.ModelForm):
             'gender': Member.GENDER,
         }
 
+class MemberSearchForm(forms.Form):
+    q = forms.CharField(
+        required=False, label='',
+        widget=TextInput(attrs={'placeholder': 'Name, email or phone',
+                                'class': 'form-control mr-2'})
+    )
+    status = forms.ChoiceField(
+        required=False, label='',
+        choices=[('', 'All statuses')] + Member.STATUS,
+        widget=Select(attrs={'class': 'form-control mr-2'})
+    )
+    mem_type = forms.ChoiceField(
+        required=False, label='',
+        choices=[('', 'All types')] + Member.MEM_TYPE,
+        widget=Select(attrs={'class': 'form-control mr-2'})
+    )
+
 class MemberUpdateForm(MemberForm):
     class Meta:
         model = Member
@@ -151,8 +191,15 @@ class CheckInForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         aca_id = kwargs.pop('aca_id')
         super().__init__(*args, **kwargs)
-        # Show only current academy's courses as an option
-        self.fields['course'].queryset = Course.objects.filter(aca_id=aca_id)
+        # Show only today's courses with the running or next one selected
+        now = timezone.localtime()
+        courses = Course.find_courses_on(aca_id, now.date())
+        current = Course.find_current_course(aca_id, now)
+        # No courses today? Let students choose any course
+        if current is None and not courses.exists():
+            courses = Course.objects.filter(aca_id=aca_id)
+        self.fields['course'].queryset = courses
+        self.fields['course'].initial = current
 
 class AttendanceForm(forms.ModelForm):
     class Meta:
@@ -161,7 +208,8 @@ class AttendanceForm(forms.ModelForm):
         widgets = {
             'date_attended': DateInput(attrs={'type': 'date'}),
             'time_attended': TimeInput(format='%H:%M', attrs={
-                'type':'time'})
+                'type':'time'}),
+            'member': MemberSearchSelect()
         }
 
     def __init__(self, *args, **kwargs):
@@ -181,6 +229,16 @@ class AttendanceDateForm(forms.ModelForm):
             'date_attended': ''
         }
 
+class AttendanceRangeForm(forms.Form):
+    start_date = forms.DateField(
+        required=False, label='From',
+        widget=DateInput(attrs={'type': 'date', 'class': 'form-control mx-2'})
+    )
+    end_date = forms.DateField(
+        required=False, label='To',
+        widget=DateInput(attrs={'type': 'date', 'class': 'form-control mx-2'})
+    )
+
 class MemberRankForm(forms.ModelForm):
     class Meta:
         model = MemberRank
@@ -295,6 +353,21 @@ class MemberPaymentAddForm(forms.ModelForm):
             # Show only current academy's payment terms as an option
             self.fields['pay_term'].queryset = PaymentTerm.objects.filter(aca_id=aca_id)
 
+class MemberImportPaymentForm(MemberPaymentAddForm):
+    """
+    Payment information of an imported member. Payment terms are matched
+    by name by the importer instead of being looked up for every row.
+    """
+    class Meta(MemberPaymentAddForm.Meta):
+        fields = ('pay_status', 'nth_day')
+
+class MemberImportForm(forms.Form):
+    csv_file = forms.FileField(label='CSV file')
+    dry_run = forms.BooleanField(
+        required=False, initial=True,
+        label='Only check the file without importing (dry run)'
+    )
+
 class MemberPaymentUpdateForm(MemberPaymentAddForm):
     class Meta:
         model = MemberPayment
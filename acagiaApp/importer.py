@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------
+# Name:        importer
+# Purpose:     Imports members from CSV files
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Imports members from a CSV file with the same validation rules as the
+add member page. The default rank and payment terms are looked up once
+and members, their ranks and payment information are inserted in chunks
+inside one transaction. Nothing is imported if any row is invalid.
+
+CSV header (mem_type and pay_status are optional):
+first_name,last_name,mem_type,date_of_birth,gender,cell_phone,email,
+address,pay_status,nth_day,pay_term
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+from acagiaApp.cache import invalidate_dashboard, invalidate_kiosk
+from acagiaApp.forms import MemberForm, MemberImportPaymentForm
+from acagiaApp.models import Member, MemberPayment, MemberRank, \
+    PaymentTerm, Rank
+import csv
+
+# Number of members inserted per query
+CHUNK_SIZE = 500
+
+
+def import_members(aca_id, lines, dry_run=False):
+    """
+    Validates and imports members.
+    :param aca_id: academy id
+    :param lines: iterable of CSV lines (text)
+    :param dry_run: True to only validate the rows
+    :return: (number of valid rows, list of (line number, error message))
+    """
+    default_rank = Rank.objects.filter(aca_id=aca_id).order_by(
+        'rank_order').first()
+    if default_rank is None:
+        return 0, [(0, 'Make your ranking system first.')]
+    # Payment terms by lowercased name
+    terms = {term.term_name.lower(): term
+             for term in PaymentTerm.objects.filter(aca_id=aca_id)}
+
+    today = timezone.localdate()
+    rows = []
+    errors = []
+    # Line 1 is the header
+    for line, row in enumerate(csv.DictReader(lines), 2):
+        row = {key.strip(): (value or '').strip()
+               for key, value in row.items() if key}
+        row.setdefault('mem_type', '')
+        row['mem_type'] = row['mem_type'] or Member.STU
+        row.setdefault('pay_status', '')
+        row['pay_status'] = row['pay_status'] or MemberPayment.UNPAID
+        form = MemberForm(row)
+        pay_form = MemberImportPaymentForm(row)
+        term = terms.get(row.get('pay_term', '').lower())
+        row_errors = []
+        for bound in (form, pay_form):
+            for field, messages in bound.errors.items():
+                row_errors.append(field + ': ' + ' '.join(messages))
+        if term is None:
+            row_errors.append('pay_term: Unknown payment term "' +
+                              row.get('pay_term', '') + '"')
+        if row_errors:
+            errors.append((line, '; '.join(row_errors)))
+            continue
+        member = form.save(commit=False)
+        member.aca_id = aca_id
+        member.member_since = today
+        # bulk_create doesn't go through Member.save
+        member.normalized_first = Member.normalize_name(member.first_name)
+        member.normalized_last = Member.normalize_name(member.last_name)
+        payment = pay_form.save(commit=False)
+        payment.pay_term = term
+        rows.append((member, payment))
+
+    if not dry_run and not errors:
+        with transaction.atomic():
+            for i in range(0, len(rows), CHUNK_SIZE):
+                save_chunk(rows[i:i + CHUNK_SIZE], aca_id, default_rank)
+        invalidate_dashboard(aca_id)
+        invalidate_kiosk(aca_id)
+    return len(rows), errors
+
+def save_chunk(rows, aca_id, default_rank):
+    """
+    Inserts members with their default rank and payment information.
+    :param rows: list of (Member, MemberPayment) not saved yet
+    :param aca_id: academy id
+    :param default_rank: first rank in the academy's ranking system
+    """
+    members = [member for member, payment in rows]
+    # Django 2.2 name first, renamed in 3.0
+    features = connection.features
+    if getattr(features, 'can_return_ids_from_bulk_insert', False) or \
+            getattr(features, 'can_return_rows_from_bulk_insert', False):
+        Member.objects.bulk_create(members)
+    else: # Member ids are needed below
+        for member in members:
+            member.save()
+    MemberRank.objects.bulk_create(
+        [MemberRank(member_id=member.id, aca_id=aca_id, rank=default_rank,
+                    days_left=default_rank.days_required)
+         for member in members])
+    for member, payment in rows:
+        payment.member_id = member.id
+    MemberPayment.objects.bulk_create([payment for member, payment in rows])
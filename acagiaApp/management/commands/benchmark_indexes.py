@@ -0,0 +1,114 @@
+# ----------------------------------------------------------------------
+# Name:        benchmark_indexes
+# Purpose:     Benchmarks the hot filter queries with and without indexes
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Shows query plans and timings of the queries views filter on most,
+first with the composite indexes dropped and then with them in place.
+Seed a large dataset first (e.g. with seed_academy) to get meaningful
+numbers. Indexes are dropped with plain DROP INDEX statements inside a
+transaction that is rolled back, so the database needs transactional DDL
+(PostgreSQL, SQLite).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from acagiaApp.models import Academy, Attendance, Event, Member, MemberRank
+import time
+
+# Indexes built around the query shapes below
+INDEXES = [
+    'att_aca_date_time_id_idx',
+    'member_aca_status_idx',
+    'event_aca_dates_idx',
+    'mr_aca_days_left_idx',
+]
+
+
+def get_queries(aca_id, day):
+    """
+    Gets the query shapes used by the attendance, academy, events and
+    promotion views.
+    :param aca_id: academy id
+    :param day: date to look up
+    :return: (dictionary) key:query name, value:queryset
+    """
+    return {
+        'attendance by date': Attendance.objects.filter(
+            aca_id=aca_id, date_attended=day),
+        'attendance log page': Attendance.objects.filter(
+            aca_id=aca_id).order_by('-date_attended', '-time_attended',
+                                    '-id')[:51],
+        'members by status': Member.objects.filter(
+            aca_id=aca_id, status=Member.ACTIVE).values('id'),
+        'events on date': Event.objects.filter(
+            aca_id=aca_id, start_date__lte=day, end_date__gte=day),
+        'promotion list': MemberRank.objects.filter(
+            aca_id=aca_id, days_left__lte=7).order_by('days_left'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Shows query plans and timings with and without the composite ' \
+           'indexes on the hot filter columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aca', type=int,
+                            help='Academy id (default: first academy)')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Number of runs to average per query')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            raise CommandError('The database can\'t roll back dropped '
+                               'indexes, use PostgreSQL or SQLite.')
+        aca_id = options['aca'] or Academy.objects.order_by(
+            'id').values_list('id', flat=True).first()
+        if aca_id is None:
+            raise CommandError('No academy found, seed some data first.')
+        # The academy's latest day with attendance
+        day = Attendance.objects.filter(aca_id=aca_id).order_by(
+            '-date_attended').values_list('date_attended', flat=True).first()
+        if day is None:
+            raise CommandError('No attendance found for academy %s.' % aca_id)
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            # The schema editor can't run inside a transaction on SQLite
+            with connection.cursor() as cursor:
+                for name in INDEXES:
+                    cursor.execute('DROP INDEX ' +
+                                   connection.ops.quote_name(name))
+            before = self.run_queries(aca_id, day, repeat, 'WITHOUT INDEXES')
+            # Bring the indexes back
+            transaction.set_rollback(True)
+        after = self.run_queries(aca_id, day, repeat, 'WITH INDEXES')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('SUMMARY (ms per query)'))
+        for name in before:
+            self.stdout.write(f'{name:<22} {before[name]:>10.2f} '
+                              f'{after[name]:>10.2f}')
+
+    def run_queries(self, aca_id, day, repeat, title):
+        """
+        Prints the plan of each query and times it.
+        :param aca_id: academy id
+        :param day: date to look up
+        :param repeat: number of runs to average
+        :param title: heading to print
+        :return: (dictionary) key:query name, value:average milliseconds
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        timings = {}
+        for name, queryset in get_queries(aca_id, day).items():
+            self.stdout.write(self.style.SQL_FIELD(name))
+            self.stdout.write(queryset.explain())
+            start = time.perf_counter()
+            for i in range(repeat):
+                # Clone so results aren't cached between runs
+                list(queryset.all())
+            timings[name] = (time.perf_counter() - start) * 1000 / repeat
+            self.stdout.write(f'{timings[name]:.2f} ms\n')
+        return timings
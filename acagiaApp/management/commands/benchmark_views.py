@@ -0,0 +1,189 @@
+# ----------------------------------------------------------------------
+# Name:        benchmark_views
+# Purpose:     Benchmarks the main views against query/latency budgets
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Seeds a fixed load profile, drives the main views through the Django test
+client and records query counts, wall time and peak memory per view.
+Results are written as JSON and compared against the checked-in budgets
+in acagiaApp/benchmarks/budgets.json; any view over budget fails the run.
+Everything runs in a transaction that is rolled back at the end, but use
+a development database anyway.
+
+e.g. python manage.py benchmark_views --output bench_results.json
+"""
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from acagiaApp import cache
+from acagiaApp.middleware import get_timezone
+from acagiaApp.models import Academy, Course, Event, Member
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))), 'benchmarks',
+    'budgets.json')
+# Load profile the budgets are made for
+SEED_OPTIONS = {'academies': 1, 'members': 200, 'years': 1, 'seed': 0,
+                'user': 'benchmark'}
+
+
+class Rollback(Exception):
+    """
+    Raised to roll back everything the benchmark wrote.
+    """
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the main views against query and latency budgets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per view')
+        parser.add_argument('--output', default='bench_results.json',
+                            help='JSON file to write results to')
+        parser.add_argument('--budgets', default=BUDGETS_FILE,
+                            help='JSON file with budgets per view')
+        parser.add_argument('--time-factor', type=float, default=1.0,
+                            help='Multiplier for time budgets on slower '
+                                 'machines')
+
+    def handle(self, *args, **options):
+        # Lets the test client through ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                call_command('seed_academy', stdout=io.StringIO(),
+                             **SEED_OPTIONS)
+                results = self.run_views(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+        with open(options['budgets']) as f:
+            budgets = json.load(f)
+        regressions = self.compare(results, budgets, options['time_factor'])
+        if regressions:
+            raise CommandError('Over budget:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('All views within budget'))
+
+    def run_views(self, repeat):
+        """
+        Logs in as the seeded academy's owner and benchmarks each view.
+        :param repeat: timed runs per view
+        :return: (dictionary) key:view name, value:measurements
+        """
+        academy = Academy.objects.filter(
+            user__username=SEED_OPTIONS['user']).latest('id')
+        member = Member.objects.filter(aca=academy).first()
+        # Check-in only takes courses on the academy's current day
+        now = timezone.localtime(timezone=get_timezone(academy.time_zone))
+        course = Course.find_current_course(academy.id, now) or \
+            Course.find_courses_on(academy.id, now.date()).first()
+        if course is None:
+            raise CommandError('No course found on ' + str(now.date()))
+        event = Event.objects.filter(aca=academy).first()
+        client = Client()
+        client.force_login(academy.user)
+        # Entering the dashboard stores the academy in the session
+        client.get(reverse('first_dashboard', kwargs={'pk': academy.id}))
+
+        # key:view name, value:(method, url, data, expected status)
+        requests = {
+            'dashboard': ('get', reverse('dashboard'), None, 200),
+            'check_in': ('get', reverse('check_in'), None, 200),
+            'check_in_post': ('post', reverse('check_in'), {
+                'first_name': member.first_name,
+                'last_name': member.last_name, 'course': course.id}, 302),
+            'kiosk_roster': ('get', reverse('kiosk_roster'), None, 200),
+            'kiosk_check_in': ('post', reverse('kiosk_check_in'), {
+                'member': member.id, 'course': course.id}, 200),
+            'attendance_by_date': ('get', reverse('att_by_date'), None, 200),
+            'promotion_list': ('get', reverse('promo_list',
+                                              kwargs={'within': 0}), None,
+                               200),
+            'events_by_date': ('get', reverse('event_list'), None, 200),
+            'member_list': ('get', reverse('mem_list'), None, 200),
+            'add_members_to_event': ('get', reverse(
+                'event_add_mems', kwargs={'pk': event.id}), None, 200),
+            'member_search': ('get', reverse('mem_search'),
+                              {'q': 'a', 'event': event.id}, 200),
+        }
+        results = {}
+        for name, (method, url, data, status) in requests.items():
+            results[name] = self.measure(client, method, url, data, status,
+                                         repeat, academy.id)
+            self.stdout.write(f'{name:<22} {results[name]["queries"]:>5} '
+                              f'queries {results[name]["time_ms"]:>9.1f} ms '
+                              f'{results[name]["peak_kb"]:>9.0f} KB')
+        return results
+
+    def measure(self, client, method, url, data, status, repeat, aca_id):
+        """
+        Measures a view. The first (cold) run counts queries and peak
+        memory, the timed runs after it give the median wall time.
+        The cold run must return the expected status, so an error page
+        can't be measured instead of the view.
+        :return: (dictionary) queries, time_ms, peak_kb
+        """
+        request = getattr(client, method)
+        # Cold run: nothing cached for the academy (other cache entries
+        # are left alone), and room in the query log so a full log under
+        # DEBUG doesn't hide the captured queries
+        cache.invalidate_dashboard(aca_id)
+        cache.invalidate_kiosk(aca_id)
+        reset_queries()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = request(url, data)
+        # Later requests reset the query log, so count the queries now
+        num_queries = len(queries)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if response.status_code != status:
+            raise CommandError(f'{url} returned {response.status_code}, '
+                               f'expected {status}')
+
+        timings = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            request(url, data)
+            timings.append((time.perf_counter() - start) * 1000)
+        return {'queries': num_queries, 'peak_kb': peak / 1024,
+                'time_ms': statistics.median(timings)}
+
+    def compare(self, results, budgets, time_factor):
+        """
+        Compares results against budgets.
+        :return: (list) descriptions of budgets exceeded
+        """
+        regressions = []
+        for name, budget in budgets.items():
+            result = results.get(name)
+            if result is None:
+                regressions.append(f'{name}: not measured')
+                continue
+            limits = {'queries': budget['queries'],
+                      'time_ms': budget['time_ms'] * time_factor,
+                      'peak_kb': budget['peak_kb']}
+            for key, limit in limits.items():
+                if result[key] > limit:
+                    regressions.append(f'{name}: {key} {result[key]:.0f} > '
+                                       f'{limit:.0f}')
+        return regressions
@@ -0,0 +1,44 @@
+# ----------------------------------------------------------------------
+# Name:        import_members
+# Purpose:     Imports members of an academy from a CSV file
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Imports members of an academy from a CSV file (see importer for columns).
+e.g. python manage.py import_members 3 members.csv --dry-run
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from acagiaApp.importer import import_members
+import csv
+
+
+class Command(BaseCommand):
+    help = 'Imports members of an academy from a CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aca_id', type=int, help='Academy id')
+        parser.add_argument('csv_file', help='CSV file path')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only validate the rows')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='',
+                      encoding='utf-8-sig') as f:
+                num_valid, errors = import_members(options['aca_id'], f,
+                                                   options['dry_run'])
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(f'Can\'t read the file as a UTF-8 CSV '
+                               f'file ({e})')
+        for line, error in errors:
+            self.stderr.write(f'Line {line}: {error}')
+        if errors:
+            raise CommandError(f'{len(errors)} invalid rows, nothing '
+                               f'imported')
+        if options['dry_run']:
+            self.stdout.write(f'{num_valid} rows are valid')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{num_valid} members imported'))
@@ -0,0 +1,127 @@
+# ----------------------------------------------------------------------
+# Name:        reencode_photos
+# Purpose:     Re-encodes existing member photos
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Re-encodes the existing mem_photos/ tree in the configured output format
+(MEMBER_PHOTO_FORMATS setting) in parallel across CPU cores and points
+members to the re-encoded files.
+With --pending, processes photos of members still waiting for their new
+photo instead, e.g. after the server stopped with photos still queued.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from acagiaApp import photos
+from acagiaApp.cache import invalidate_dashboard
+from acagiaApp.models import Member
+import os
+
+# Number of members updated per query
+BATCH_SIZE = 500
+
+
+def reencode(name):
+    """
+    Re-encodes a photo in a worker process. The original is kept until
+    members point to the new file.
+    :param name: photo's storage name
+    :return: (original name, new name), new name is None if failed
+    """
+    storage = Member._meta.get_field('img').storage
+    try:
+        return name, photos.encode_photo(storage, name, keep_original=True)
+    except (OSError, ValueError):
+        return name, None
+
+
+class Command(BaseCommand):
+    help = 'Re-encodes existing member photos in the configured format.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of worker processes')
+        parser.add_argument('--pending', action='store_true',
+                            help='Only process newly uploaded photos that '
+                                 'aren\'t ready yet')
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            self.process_pending()
+            return
+        storage = Member._meta.get_field('img').storage
+        ext = photos.EXTENSIONS[photos.output_format()]
+        names = self.get_photo_names(storage, ext)
+        self.stdout.write(f'Re-encoding {len(names)} photos as {ext}')
+
+        renamed = {}
+        num_fail = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for name, new_name in pool.map(reencode, names, chunksize=8):
+                if new_name is None:
+                    num_fail += 1
+                    self.stderr.write(f'Failed to re-encode {name}')
+                elif new_name != name:
+                    renamed[name] = new_name
+
+        self.update_members(renamed)
+        # Members point to the new files now, remove the originals
+        for name in renamed:
+            storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(names) - num_fail} photos re-encoded, {num_fail} failed'))
+
+    def process_pending(self):
+        """
+        Processes photos of members whose new photo was never processed.
+        """
+        member_ids = list(Member.objects.filter(img_ready=False).order_by(
+            'id').values_list('id', flat=True))
+        for member_id in member_ids:
+            photos.process_photo(member_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(member_ids)} pending photos processed'))
+
+    def get_photo_names(self, storage, ext):
+        """
+        Gets storage names of photos under mem_photos/ that aren't in the
+        output format yet. The default photo keeps its name.
+        :param storage: file storage photos are in
+        :param ext: output format's file extension
+        :return: (list) photo names
+        """
+        names = []
+        root = storage.path('mem_photos')
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.tmp', ext)):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, storage.location).replace(
+                    os.sep, '/')
+                if name != Member.DEFAULT_IMG:
+                    names.append(name)
+        return sorted(names)
+
+    def update_members(self, renamed):
+        """
+        Points members to their re-encoded photos in batches.
+        :param renamed: (dictionary) key:original name, value:new name
+        """
+        names = list(renamed)
+        aca_ids = set()
+        with transaction.atomic():
+            for i in range(0, len(names), BATCH_SIZE):
+                members = list(Member.objects.filter(
+                    img__in=names[i:i + BATCH_SIZE]).only('id', 'aca_id',
+                                                          'img'))
+                for member in members:
+                    member.img = renamed[member.img.name]
+                    aca_ids.add(member.aca_id)
+                Member.objects.bulk_update(members, ['img'])
+        # Updated without signals, cached photo urls are stale
+        for aca_id in aca_ids:
+            invalidate_dashboard(aca_id)
@@ -0,0 +1,240 @@
+# ----------------------------------------------------------------------
+# Name:        seed_academy
+# Purpose:     Seeds synthetic academies for load testing
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Generates academies with members, ranks, courses, payment terms, years of
+attendance and events with attendees. Rows are inserted with bulk_create
+in batches and the same arguments (including --seed and --end-date)
+always generate the same data, so benchmarks can be repeated.
+
+e.g. python manage.py seed_academy --academies 10 --members 2000 --years 3
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from acagiaApp.cache import invalidate_dashboard
+from acagiaApp.models import Academy, Attendance, Course, Event, Member, \
+    MemberEvent, MemberPayment, MemberRank, PaymentTerm, Rank
+import random
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer',
+               'Michael', 'Linda', 'William', 'Elizabeth', 'David', 'Susan',
+               'Daniel', 'Jessica', 'Joseph', 'Sarah', 'Min', 'Ji-woo',
+               'Hiro', 'Yuna', 'Carlos', 'Sofia', 'Liam', 'Olivia', 'Noah',
+               'Emma', 'Ethan', 'Ava', 'Lucas', 'Mia']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia',
+              'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Kim', 'Lee',
+              'Park', 'Choi', 'Nguyen', 'Tanaka', 'Sato', 'Lopez', 'Wilson',
+              'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin']
+# (rank, days required)
+RANKS = [('White', 16), ('Yellow', 16), ('Ad-Yellow', 16), ('Orange', 16),
+         ('Purple', 24), ('Ad-Purple', 24), ('Green', 24), ('Blue', 24),
+         ('Ad-Blue', 24), ('Brown', 24), ('Red', 24), ('Ad-Red', 30),
+         ('Danbo', 48), ('Black', 60)]
+# (class name, days, start time, end time)
+COURSES = [('Little Tigers', 'M/W/F', time(16, 0), time(16, 45)),
+           ('Kids', 'M/T/W/Th/F', time(17, 0), time(17, 50)),
+           ('Teens', 'T/Th', time(18, 0), time(18, 50)),
+           ('Adults', 'M/W/F', time(19, 0), time(20, 0)),
+           ('Sparring', 'Sa', time(10, 0), time(11, 30)),
+           ('Open Mat', 'S', time(12, 0), time(14, 0))]
+# (term name, amount, every n month, installments, discount)
+PAY_TERMS = [('Monthly', Decimal('150.00'), 1, 0, 0),
+             ('6-month', Decimal('810.00'), 6, 0, 10),
+             ('1-year-installation', Decimal('1800.00'), 12, 12, 15)]
+
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic academies with members, attendance and events.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academies', type=int, default=1)
+        parser.add_argument('--members', type=int, default=200,
+                            help='Members per academy')
+        parser.add_argument('--years', type=int, default=1,
+                            help='Years of attendance history')
+        parser.add_argument('--visits', type=float, default=2.0,
+                            help='Average visits per member per week')
+        parser.add_argument('--events', type=int, default=2,
+                            help='Events per month')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed')
+        parser.add_argument('--end-date', type=date.fromisoformat,
+                            default=date.today(),
+                            help='Last day of history (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--user', default='seed',
+                            help='Username owning the academies')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        User = get_user_model()
+        user, created = User.objects.get_or_create(
+            username=options['user'],
+            defaults={'email': options['user'] + '@example.com'})
+        if created:
+            # Seeded data is only looked at through force_login (e.g. by
+            # benchmark_views), so the owner can't log in
+            user.set_unusable_password()
+            user.save()
+
+        end = options['end_date']
+        start = end - timedelta(days=365 * options['years'])
+        for i in range(options['academies']):
+            with transaction.atomic():
+                academy = Academy.objects.create(
+                    user=user, aca_name=f'Seed Academy {i + 1}',
+                    aca_type=Academy.TKD, office_phone='408-555-0100',
+                    location='San Jose, CA')
+                self.seed_academy(academy, options['members'], start, end,
+                                  options['visits'], options['events'])
+            invalidate_dashboard(academy.id)
+            self.stdout.write(f'Seeded {academy}')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def seed_academy(self, academy, num_members, start, end, visits,
+                     events_per_month):
+        """
+        Seeds an academy's ranks, courses, payment terms, members,
+        attendance and events.
+        """
+        rng = self.rng
+        Rank.objects.bulk_create(
+            [Rank(aca=academy, rank_order=order, rank=name,
+                  days_required=days)
+             for order, (name, days) in enumerate(RANKS, 1)])
+        ranks = list(Rank.objects.filter(aca=academy).order_by('rank_order'))
+        Course.objects.bulk_create(
+            [Course(aca=academy, course_name=name, course_days=days,
+                    days_mask=Course.days_to_mask(days),
+                    start_time=start_time, end_time=end_time)
+             for name, days, start_time, end_time in COURSES])
+        courses = list(Course.objects.filter(aca=academy).order_by('id'))
+        PaymentTerm.objects.bulk_create(
+            [PaymentTerm(aca=academy, term_name=name, amount=amount,
+                         n_month=n_month, install_factor=install,
+                         discount=discount)
+             for name, amount, n_month, install, discount in PAY_TERMS])
+        terms = list(PaymentTerm.objects.filter(aca=academy).order_by('id'))
+
+        # Members
+        self.bulk_insert(Member, (self.make_member(academy, start, end)
+                                  for i in range(num_members)))
+        member_ids = list(Member.objects.filter(aca=academy).order_by(
+            'id').values_list('id', flat=True))
+        self.bulk_insert(MemberRank, (self.make_member_rank(academy, id, ranks)
+                                      for id in member_ids))
+        self.bulk_insert(MemberPayment, (
+            MemberPayment(member_id=id, nth_day=rng.randint(1, 28),
+                          pay_term=rng.choice(terms),
+                          pay_status=rng.choice([MemberPayment.PAID,
+                                                 MemberPayment.UNPAID]))
+            for id in member_ids))
+
+        # Attendance
+        courses_by_day = {weekday: [course for course in courses
+                                    if course.days_mask & 1 << weekday]
+                          for weekday in range(len(Course.WEEKDAYS))}
+        self.bulk_insert(Attendance, self.make_attendance(
+            academy, member_ids, courses_by_day, start, end, visits))
+
+        # Events with attendees
+        num_months = (end - start).days // 30
+        for i in range(num_months * events_per_month):
+            event_start = start + timedelta(
+                days=rng.randrange((end - start).days + 1))
+            event = Event.objects.create(
+                aca=academy, title=f'Event {i + 1}', start_date=event_start,
+                end_date=event_start + timedelta(days=rng.randint(0, 2)),
+                credit=rng.randint(1, 3))
+            attendees = rng.sample(member_ids, rng.randint(
+                0, max(1, len(member_ids) // 10)))
+            self.bulk_insert(MemberEvent, (
+                MemberEvent(member_id=id, event=event) for id in attendees))
+
+    def make_member(self, academy, start, end):
+        """
+        Makes a random member.
+        """
+        rng = self.rng
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        return Member(
+            aca=academy, first_name=first_name, last_name=last_name,
+            # bulk_create doesn't go through Member.save
+            normalized_first=Member.normalize_name(first_name),
+            normalized_last=Member.normalize_name(last_name),
+            mem_type=rng.choices([Member.STU, Member.INST],
+                                 weights=[30, 1])[0],
+            status=rng.choices([Member.ACTIVE, Member.INACTIVE, Member.HOLD],
+                               weights=[80, 15, 5])[0],
+            date_of_birth=end - timedelta(days=rng.randint(4 * 365,
+                                                           60 * 365)),
+            gender=rng.choice(['M', 'F']),
+            cell_phone=f'408-555-{rng.randint(0, 9999):04d}',
+            email=f'{first_name}.{last_name}{rng.randint(1, 9999)}'
+                  f'@example.com'.lower(),
+            member_since=start + timedelta(
+                days=rng.randrange((end - start).days + 1)))
+
+    def make_member_rank(self, academy, member_id, ranks):
+        """
+        Makes a member's rank with consistent day counters.
+        """
+        rng = self.rng
+        rank = rng.choice(ranks)
+        days_attended = rng.randint(0, rank.days_required)
+        return MemberRank(
+            aca=academy, member_id=member_id, rank=rank,
+            days_attended=days_attended,
+            days_left=rank.days_required - days_attended,
+            total_days=days_attended + rng.randint(0, 500))
+
+    def make_attendance(self, academy, member_ids, courses_by_day, start,
+                        end, visits):
+        """
+        Generates attendance records day by day.
+        """
+        rng = self.rng
+        # Average check-ins per day
+        per_day = len(member_ids) * visits / 7
+        day = start
+        while day <= end:
+            courses = courses_by_day[day.weekday()]
+            if courses:
+                num = min(len(member_ids),
+                          max(0, int(rng.gauss(per_day, per_day / 5))))
+                for member_id in rng.sample(member_ids, num):
+                    course = rng.choice(courses)
+                    # Check in up to 10 minutes before class starts
+                    checked_in = datetime.combine(day, course.start_time) - \
+                        timedelta(seconds=rng.randint(0, 600))
+                    yield Attendance(aca=academy, date_attended=day,
+                                     time_attended=checked_in.time(),
+                                     member_id=member_id, course=course)
+            day += timedelta(days=1)
+
+    def bulk_insert(self, model, rows):
+        """
+        Inserts rows in batches.
+        :param model: model class
+        :param rows: iterable of model objects
+        """
+        rows = iter(rows)
+        fields = model._meta.concrete_fields
+        batch = list(islice(rows, self.batch_size))
+        while batch:
+            # Django 2.2 doesn't cap a given batch size at the backend's
+            # limit (e.g. SQLite's query parameters)
+            batch_size = min(self.batch_size,
+                             connection.ops.bulk_batch_size(fields, batch))
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            batch = list(islice(rows, self.batch_size))
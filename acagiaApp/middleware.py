@@ -1,5 +1,30 @@
 import pytz
 from django.utils import timezone
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+import json
+import logging
+import re
+import time
+try: # Python 3.9+
+    import zoneinfo
+except ImportError:
+    zoneinfo = None
+
+@lru_cache(maxsize=None)
+def get_timezone(tzname):
+    """
+    Resolves a time zone name once per process. Uses the stdlib zoneinfo
+    when USE_ZONEINFO is set and available, otherwise pytz.
+    :param tzname: time zone name e.g. US/Pacific
+    :return: tzinfo object
+    """
+    if zoneinfo and getattr(settings, 'USE_ZONEINFO', False):
+        return zoneinfo.ZoneInfo(tzname)
+    return pytz.timezone(tzname)
 
 class TimezoneMiddleware:
     """
@@ -9,10 +34,94 @@ class TimezoneMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        # The academy's time zone name is stored in the session once
+        # (see set_timezone) and resolved from the per-process cache
         tzname = request.session.get('django_timezone')
         if tzname:
-            timezone.activate(pytz.timezone(tzname))
+            timezone.activate(get_timezone(tzname))
         else:
             timezone.deactivate()
         return self.get_response(request)
 
+# Log file with one JSON line per profiled request
+PROFILE_LOG = getattr(settings, 'QUERY_PROFILING_LOG', 'query_profile.log')
+# Number of slowest statements kept per request
+NUM_SLOWEST = 5
+
+profile_logger = logging.getLogger('acagiaApp.query_profile')
+
+class QueryProfilingMiddleware:
+    """
+    Opt-in middleware (QUERY_PROFILING = True) that records the number of
+    SQL queries, total DB time, repeated query shapes (N+1 patterns) and
+    the slowest statements of each request to a rotating log file.
+    Works without DEBUG as queries are captured with an execute wrapper.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if not profile_logger.handlers:
+            handler = RotatingFileHandler(PROFILE_LOG,
+                                          maxBytes=5 * 1024 * 1024,
+                                          backupCount=3)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            profile_logger.addHandler(handler)
+            profile_logger.setLevel(logging.INFO)
+            profile_logger.propagate = False
+
+    def __call__(self, request):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((sql, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        profile_logger.info(json.dumps(
+            summarize(request, response, queries, duration)))
+        return response
+
+def fingerprint(sql):
+    """
+    Reduces a statement to its shape so repeated queries can be grouped.
+    Parameters are already placeholders, only IN lists vary in length.
+    :param sql: SQL statement
+    :return: statement with IN (...) lists collapsed
+    """
+    return re.sub(r'IN \((%s(, )?)+\)', 'IN (...)', sql)
+
+def summarize(request, response, queries, duration):
+    """
+    Summarizes the queries of a request.
+    :param queries: (list) (sql, seconds) of each query
+    :param duration: request time in seconds
+    :return: (dictionary) profile of the request
+    """
+    counts = {}
+    for sql, seconds in queries:
+        shape = fingerprint(sql)
+        counts[shape] = counts.get(shape, 0) + 1
+    duplicates = sorted(((count, shape) for shape, count in counts.items()
+                         if count > 1), reverse=True)
+    slowest = sorted(queries, key=lambda query: query[1],
+                     reverse=True)[:NUM_SLOWEST]
+    return {
+        'time': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'num_queries': len(queries),
+        'db_ms': round(sum(seconds for sql, seconds in queries) * 1000, 2),
+        'duplicates': [{'count': count, 'sql': shape}
+                       for count, shape in duplicates],
+        'slowest': [{'ms': round(seconds * 1000, 2), 'sql': sql}
+                    for sql, seconds in slowest],
+    }
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.5 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+def normalize_names(apps, schema_editor):
+    """
+    Fills in normalized names of existing members.
+    """
+    Member = apps.get_model('acagiaApp', 'Member')
+    members = list(Member.objects.only('id', 'first_name', 'last_name'))
+    for member in members:
+        member.normalized_first = ''.join(member.first_name.split()).lower()
+        member.normalized_last = ''.join(member.last_name.split()).lower()
+    Member.objects.bulk_update(members, ['normalized_first',
+                                         'normalized_last'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acagiaApp', '0053_auto_20200503_0912'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='normalized_first',
+            field=models.CharField(default='', editable=False, max_length=35),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='normalized_last',
+            field=models.CharField(default='', editable=False, max_length=35),
+        ),
+        migrations.RunPython(normalize_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['aca', 'normalized_first', 'normalized_last'], name='member_aca_norm_name_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.5 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acagiaApp', '0054_member_normalized_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='img_ready',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+    ]
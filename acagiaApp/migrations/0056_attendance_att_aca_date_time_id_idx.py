@@ -0,0 +1,17 @@
+# Generated by Django 2.2.5 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acagiaApp', '0055_member_img_ready'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['aca', '-date_attended', '-time_attended', '-id'], name='att_aca_date_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.5 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acagiaApp', '0056_attendance_att_aca_date_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['aca', 'status'], name='member_aca_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['aca', 'start_date', 'end_date'], name='event_aca_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberrank',
+            index=models.Index(fields=['aca', 'days_left'], name='mr_aca_days_left_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.5 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acagiaApp', '0057_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['aca', 'normalized_last'], name='member_aca_norm_last_idx'),
+        ),
+    ]
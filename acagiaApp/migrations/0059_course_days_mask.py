@@ -0,0 +1,40 @@
+# Generated by Django 2.2.5 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+# Day codes by weekday (Monday is 0)
+WEEKDAYS = ['M', 'T', 'W', 'Th', 'F', 'Sa', 'S']
+
+
+def fill_days_mask(apps, schema_editor):
+    """
+    Fills in day bitmasks of existing courses.
+    """
+    Course = apps.get_model('acagiaApp', 'Course')
+    courses = list(Course.objects.only('id', 'course_days'))
+    for course in courses:
+        course.days_mask = 0
+        for code in course.course_days.split('/'):
+            if code in WEEKDAYS:
+                course.days_mask |= 1 << WEEKDAYS.index(code)
+    Course.objects.bulk_update(courses, ['days_mask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acagiaApp', '0058_member_aca_norm_last_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='days_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_days_mask, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['aca', 'days_mask', 'end_time'], name='course_aca_days_end_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import F
 from users.models import CustomUser as User
 from datetime import date
-from PIL import Image # for resizing image file
+from acagiaApp import photos # for resizing image file
+from acagiaApp import thumbnails
+from django.urls import reverse
 from datetime import timedelta # for calculating age based on birth day
 import pytz # for choices of common time zones
 from django.utils import timezone
@@ -88,6 +91,7 @@ class Member(models.Model):
         (HOLD, 'Hold')
     ]
     IMAGE_SIZE = (300, 350)
+    DEFAULT_IMG = 'mem_photos/no-img.png'
 
     aca = models.ForeignKey(
         Academy, related_name='mem_aca', on_delete=models.CASCADE
@@ -109,22 +113,89 @@ class Member(models.Model):
         default='mem_photos/no-img.png',
         null=True, blank=True
     )
+    # False while a new image is being resized in the background
+    img_ready = models.BooleanField(default=True, editable=False)
     member_since = models.DateField()
+    # Lowercased names without whitespace for check-in lookups
+    normalized_first = models.CharField(max_length=35, default='',
+                                        editable=False)
+    normalized_last = models.CharField(max_length=35, default='',
+                                       editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['aca', 'normalized_first',
+                                 'normalized_last'],
+                         name='member_aca_norm_name_idx'),
+            # Member search also matches last name prefixes
+            models.Index(fields=['aca', 'normalized_last'],
+                         name='member_aca_norm_last_idx'),
+            # Dashboard counts members by status
+            models.Index(fields=['aca', 'status'],
+                         name='member_aca_status_idx'),
+        ]
 
     def __str__(self):
         return self.first_name + ' ' + self.last_name
 
-    # https://stackoverflow.com/questions/24373341/django-image-resizing-and-convert-before-upload
-    def save(self):
+    def save(self, *args, **kwargs):
+        """
+        Normalizes member's name and schedules resizing of a newly
+        uploaded profile image in the background.
+        """
+        self.normalized_first = Member.normalize_name(self.first_name)
+        self.normalized_last = Member.normalize_name(self.last_name)
+        # Uploaded files aren't committed to the storage until saved
+        new_img = bool(self.img) and not self.img._committed
+        if new_img:
+            self.img_ready = False
+        super().save(*args, **kwargs)
+        if new_img:
+            photos.schedule_photo(self.id)
+
+    @property
+    def photo_url(self):
+        """
+        Gets the profile image url, or the default image's url
+        while a new image is still being processed.
+        :return: image url
+        """
+        if self.img and self.img_ready:
+            return self.img.url
+        return self.img.storage.url(Member.DEFAULT_IMG)
+
+    @property
+    def photo_name(self):
+        """
+        Gets the storage name of the image to show for the member.
+        :return: profile image name, or the default image's name
+        """
+        if self.img and self.img_ready:
+            return self.img.name
+        return Member.DEFAULT_IMG
+
+    def thumbnail_url(self, size):
         """
-        Resizes a profile image.
+        Gets the url of the member's photo in one of the thumbnail sizes.
+        The url changes whenever the photo changes, so it can be cached
+        by browsers for a long time.
+        :param size: thumbnail size name (see thumbnails.SIZES)
+        :return: thumbnail url
         """
-        if self.img:
-            super().save()
-            image = Image.open(self.img)
-            size = Member.IMAGE_SIZE
-            image = image.resize(size, Image.ANTIALIAS)
-            image.save(self.img.path)
+        return reverse('mem_photo', kwargs={'pk': self.id, 'size': size}) \
+            + '?v=' + thumbnails.version(self.photo_name)
+
+    @property
+    def small_photo_url(self):
+        return self.thumbnail_url('small')
+
+    @property
+    def medium_photo_url(self):
+        return self.thumbnail_url('medium')
+
+    @property
+    def large_photo_url(self):
+        return self.thumbnail_url('large')
 
     # https://stackoverflow.com/questions/2217488/age-from-birthdate-in-python
     @property
@@ -140,17 +211,28 @@ class Member(models.Model):
     @classmethod
     def find_member_by_name(cls, aca_id, fname, lname):
         """
-        Finds a member by academy id and member's first and last name.
+        Finds a member by academy id and member's first and last name
+        ignoring case and whitespace.
         :param aca_id: academy id
         :param fname: member's first name
         :param lname: member's last name
         :return: Member object if found, otherwise, None
         """
-        try:
-            return Member.objects.get(aca_id=aca_id, first_name=fname,
-                                      last_name=lname)
-        except Member.DoesNotExist:
-            return None
+        return Member.objects.filter(
+            aca_id=aca_id,
+            normalized_first=Member.normalize_name(fname),
+            normalized_last=Member.normalize_name(lname)
+        ).order_by('id').first()
+
+    @staticmethod
+    def normalize_name(name):
+        """
+        Normalizes a name for case- and whitespace-insensitive matching.
+        e.g. ' Mary Ann ' -> 'maryann'
+        :param name: first or last name
+        :return: lowercased name without whitespace
+        """
+        return ''.join((name or '').split()).lower()
 
     @classmethod
     def find_member_by_id(cls, mem_id):
@@ -181,6 +263,8 @@ class Course(models.Model):
         (SAT, 'Sat'),
         (SUN, 'Sun')
     ]
+    # Day codes by weekday (Monday is 0)
+    WEEKDAYS = [M, T, W, TH, F, SAT, SUN]
 
     aca = models.ForeignKey(
         Academy, related_name='course_aca', on_delete=models.CASCADE
@@ -193,11 +277,77 @@ class Course(models.Model):
         Member, null=True, blank=True,
         related_name='course_inst', on_delete=models.SET_NULL
     )
+    # Course days as bits by weekday (bit 0 is Monday), kept from
+    # course_days on save
+    days_mask = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Check-in looks up today's courses that haven't ended yet
+            models.Index(fields=['aca', 'days_mask', 'end_time'],
+                         name='course_aca_days_end_idx'),
+        ]
 
     def __str__(self):
         return self.course_name + ' ' + self.course_days + ' ' + \
                self.time_range
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the course with its days as a bitmask.
+        """
+        self.days_mask = Course.days_to_mask(self.course_days)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def days_to_mask(course_days):
+        """
+        Converts course days to a bitmask e.g. M/W/F -> 0b10101.
+        :param course_days: day codes separated by '/'
+        :return: bitmask of the days by weekday
+        """
+        mask = 0
+        for code in course_days.split('/'):
+            if code in Course.WEEKDAYS:
+                mask |= 1 << Course.WEEKDAYS.index(code)
+        return mask
+
+    @staticmethod
+    def masks_with_day(weekday):
+        """
+        Gets all bitmasks including the weekday, so courses on the weekday
+        can be found with an indexed IN lookup.
+        :param weekday: weekday number (Monday is 0)
+        :return: list of bitmasks
+        """
+        bit = 1 << weekday
+        return [mask for mask in range(1 << len(Course.WEEKDAYS))
+                if mask & bit]
+
+    @classmethod
+    def find_courses_on(cls, aca_id, day):
+        """
+        Finds the academy's courses on the given date by start time.
+        :param aca_id: academy id
+        :param day: date
+        :return: courses on the date
+        """
+        return cls.objects.filter(
+            aca_id=aca_id, days_mask__in=cls.masks_with_day(day.weekday())
+        ).order_by('start_time', 'id')
+
+    @classmethod
+    def find_current_course(cls, aca_id, now):
+        """
+        Finds the course running at the given local time, or the next
+        course of the day if none is running.
+        :param aca_id: academy id
+        :param now: academy's local datetime
+        :return: course if found, otherwise, None
+        """
+        return cls.find_courses_on(aca_id, now.date()).filter(
+            end_time__gt=now.time()).first()
+
     # Added for attendance view
     @property
     def course_info_time_first(self):
@@ -219,6 +369,13 @@ class Event(models.Model):
     credit = models.IntegerField(blank=True, null=True, default=0)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Events are looked up by the dates they overlap
+            models.Index(fields=['aca', 'start_date', 'end_date'],
+                         name='event_aca_dates_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -311,9 +468,89 @@ class MemberRank(models.Model):
     days_left = models.IntegerField(default=0, blank=True)
     total_days = models.IntegerField(default=0, blank=True)
 
+    class Meta:
+        indexes = [
+            # Promotion lists filter and sort by days left
+            models.Index(fields=['aca', 'days_left'],
+                         name='mr_aca_days_left_idx'),
+        ]
+
+    # Fields compared against the loaded values when saving
+    TRACKED_FIELDS = ('rank_id', 'days_attended', 'days_left', 'total_days')
+    # Snapshot of tracked fields as they are in the database
+    _loaded_values = None
+
     def __str__(self):
         return str(self.member) + '/' + (str(self.rank) or 'X')
 
+    # https://docs.djangoproject.com/en/2.2/ref/models/instances/#customizing-model-loading
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers tracked field values when loaded from the database.
+        """
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if all(field in loaded for field in cls.TRACKED_FIELDS):
+            instance._loaded_values = {field: loaded[field]
+                                       for field in cls.TRACKED_FIELDS}
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the member's rank and refreshes the loaded values snapshot.
+        """
+        super().save(*args, **kwargs)
+        self._loaded_values = {field: getattr(self, field)
+                               for field in MemberRank.TRACKED_FIELDS}
+
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Reloads fields from the database and refreshes the loaded values
+        snapshot of the reloaded tracked fields.
+        """
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            self._loaded_values = {field: getattr(self, field)
+                                   for field in MemberRank.TRACKED_FIELDS}
+        elif self._loaded_values is not None:
+            # e.g. rank and rank_id both refer to rank_id
+            names = {field.attname for field in self._meta.concrete_fields
+                     if field.name in fields or field.attname in fields}
+            for field in MemberRank.TRACKED_FIELDS:
+                if field in names:
+                    self._loaded_values[field] = getattr(self, field)
+
+    def get_loaded_values(self):
+        """
+        Gets tracked field values as they are in the database. Only queries
+        when the object wasn't loaded from the database (e.g. built by id).
+        :return: (dictionary) key:field name, value:loaded value
+        """
+        if self._loaded_values is None:
+            self._loaded_values = MemberRank.objects.filter(
+                id=self.id).values(*MemberRank.TRACKED_FIELDS).first()
+        return self._loaded_values
+
+    @classmethod
+    def add_days(cls, member_ids, credit):
+        """
+        Adds attendance credit to members' days attended at the current rank
+        (negative credit takes it away) with a single atomic UPDATE.
+        Days left and total days are adjusted the same way as saving
+        through the pre_save signal does.
+        :param member_ids: member id or a list of member ids
+        :param credit: (Number) credit for attendance
+        :return: number of updated members
+        """
+        if not isinstance(member_ids, (list, tuple, set)):
+            member_ids = [member_ids]
+        return MemberRank.objects.filter(member_id__in=member_ids).update(
+            days_attended=F('days_attended') + credit,
+            days_left=F('days_left') - credit,
+            total_days=F('total_days') + credit
+        )
+
 class Attendance(models.Model):
     aca = models.ForeignKey(
         Academy, related_name='att_aca', on_delete=models.CASCADE
@@ -328,6 +565,14 @@ class Attendance(models.Model):
         related_name='att_course', on_delete=models.SET_NULL
     )
 
+    class Meta:
+        indexes = [
+            # Attendance list is paged through newest first
+            models.Index(fields=['aca', '-date_attended', '-time_attended',
+                                 '-id'],
+                         name='att_aca_date_time_id_idx'),
+        ]
+
     def __str__(self):
         return str(self.member) + '\'s attendance record on ' + str(
             self.date_attended)
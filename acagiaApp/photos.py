@@ -0,0 +1,142 @@
+# ----------------------------------------------------------------------
+# Name:        photos
+# Purpose:     Processes member photos in the background
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Resizes uploaded member photos off the request path.
+Photos are handed to a local thread pool once the member is saved,
+so no external broker is required.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+from acagiaApp.cache import invalidate_dashboard
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Number of photos processed at the same time
+PHOTO_WORKERS = getattr(settings, 'MEMBER_PHOTO_WORKERS', 2)
+# Output formats in order of preference, the first one supported by
+# the installed Pillow is used. JPEG is always available.
+PHOTO_FORMATS = getattr(settings, 'MEMBER_PHOTO_FORMATS', ('WEBP', 'JPEG'))
+# Encoder quality target (0-100)
+PHOTO_QUALITY = getattr(settings, 'MEMBER_PHOTO_QUALITY', 80)
+
+EXTENSIONS = {'WEBP': '.webp', 'AVIF': '.avif', 'JPEG': '.jpg'}
+
+executor = ThreadPoolExecutor(max_workers=PHOTO_WORKERS,
+                              thread_name_prefix='member-photo')
+
+
+def schedule_photo(member_id):
+    """
+    Processes member's photo in the background once the current
+    transaction is committed.
+    :param member_id: member id
+    """
+    transaction.on_commit(lambda: executor.submit(process_photo, member_id))
+
+def process_photo(member_id):
+    """
+    Resizes and re-encodes member's photo and marks it ready to be shown.
+    :param member_id: member id
+    """
+    from acagiaApp.models import Member
+    try:
+        name, aca_id = Member.objects.filter(id=member_id).values_list(
+            'img', 'aca_id').first() or (None, None)
+        if name:
+            storage = Member._meta.get_field('img').storage
+            new_name = name
+            try:
+                new_name = encode_photo(storage, name, Member.IMAGE_SIZE)
+            # Nothing checks the executor's futures, so any error
+            # (e.g. DecompressionBombError) is logged here and the
+            # original photo is kept
+            except Exception:
+                logger.exception('Failed to process photo %s', name)
+            # Only when the photo hasn't been replaced in the meantime
+            if Member.objects.filter(id=member_id, img=name).update(
+                    img=new_name, img_ready=True):
+                # Updated without signals, cached photo urls are stale
+                invalidate_dashboard(aca_id)
+    except Exception:
+        logger.exception('Failed to process photo of member %s', member_id)
+    finally:
+        # Threads don't go through the request cycle closing connections
+        connection.close()
+
+def output_format():
+    """
+    Gets the preferred output format supported by the installed Pillow.
+    :return: format name e.g. WEBP
+    """
+    for img_format in PHOTO_FORMATS:
+        if img_format == 'JPEG' or features.check(img_format.lower()):
+            return img_format
+    return 'JPEG'
+
+def encode_photo(storage, name, size=None, keep_original=False):
+    """
+    Re-encodes a stored photo in the output format, resizing it first
+    if a size is given. The original file is replaced.
+    :param storage: file storage the photo is in
+    :param name: photo's storage name
+    :param size: (width, height) to resize to, None to keep the size
+    :param keep_original: True to leave the original file when the new
+                          photo gets a different name
+    :return: photo's new storage name
+    """
+    path = storage.path(name)
+    img_format = output_format()
+    new_name = os.path.splitext(name)[0] + EXTENSIONS[img_format]
+    if new_name != name:
+        new_name = storage.get_available_name(new_name)
+    new_path = storage.path(new_name)
+    with Image.open(path) as image:
+        if size:
+            # Let the decoder skip pixels that won't be needed
+            image.draft('RGB', size)
+        # Apply the camera orientation before EXIF is dropped
+        image = ImageOps.exif_transpose(image)
+        if size:
+            image = ImageOps.fit(image, size, Image.LANCZOS)
+    # Write to a temporary file first so no one reads a half-written file
+    tmp_path = f'{new_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        save_image(image, tmp_path, img_format)
+        os.replace(tmp_path, new_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if new_path != path and not keep_original:
+        os.remove(path)
+    return new_name
+
+def save_image(image, path, img_format):
+    """
+    Saves an image in the given format with the quality target.
+    EXIF and other metadata aren't written.
+    :param image: PIL image
+    :param path: file path
+    :param img_format: output format e.g. WEBP, JPEG
+    """
+    options = {'quality': PHOTO_QUALITY}
+    if img_format == 'JPEG':
+        image = image.convert('RGB')
+        options.update(progressive=True, optimize=True)
+    else:
+        has_alpha = image.mode in ('RGBA', 'LA') or \
+            (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        if img_format == 'WEBP':
+            options['method'] = 6 # Slowest but smallest encoding
+    image.save(path, format=img_format, **options)
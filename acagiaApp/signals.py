@@ -1,6 +1,7 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from acagiaApp.models import MemberRank, Rank
+from acagiaApp.models import Member, Attendance, MemberRank, Rank, Course
+from acagiaApp.cache import invalidate_dashboard, invalidate_kiosk
 from acagiaApp.views import promotion
 
 
@@ -14,34 +15,50 @@ def update_member_rank(sender, instance, update_fields, **kwargs):
     # New member
     if instance.id is None:
         return
-    # Get original obj before saving new changes to compare
-    pre_rank = MemberRank.objects.get(id=instance.id)
+    # Get original values loaded before saving new changes to compare
+    pre_rank = instance.get_loaded_values()
+    if pre_rank is None: # Row doesn't exist anymore
+        return
     # Handle when rank changed (by promotion or manually)
-    if instance.rank != pre_rank.rank:
+    if instance.rank_id != pre_rank['rank_id']:
         #print('rank changed')
         # Reset days for new rank
         instance.days_attended = 0
         instance.days_left = instance.rank.days_required
         #promotion.reset_days(instance)
     # Handle when days attended changed (event credit, check-in, or manually)
-    elif instance.days_attended != pre_rank.days_attended:
+    elif instance.days_attended != pre_rank['days_attended']:
         #print('days changed')
         # Figure out if days_attended increased or decreased
-        pre_sum = pre_rank.total_days - pre_rank.days_attended
+        pre_sum = pre_rank['total_days'] - pre_rank['days_attended']
         post_sum = instance.total_days - instance.days_attended
         # If days_attended increased, adjust others accordingly
         if pre_sum > post_sum:
-            increased_amt = instance.days_attended - pre_rank.days_attended
+            increased_amt = instance.days_attended - pre_rank['days_attended']
             instance.days_left -= increased_amt
             instance.total_days += increased_amt
         else: # days_attended decreased
-            decreased_amt = pre_rank.days_attended - instance.days_attended
+            decreased_amt = pre_rank['days_attended'] - instance.days_attended
             instance.days_left += decreased_amt
             instance.total_days -= decreased_amt
 
 
+@receiver([post_save, post_delete], sender=Member)
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=MemberRank)
+@receiver([post_save, post_delete], sender=Rank)
+def invalidate_dashboard_cache(sender, instance, **kwargs):
+    """
+    Invalidates the academy's cached dashboard when its members,
+    attendance records or ranks change.
+    """
+    invalidate_dashboard(instance.aca_id)
 
-
-
-
-
+@receiver([post_save, post_delete], sender=Member)
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_kiosk_cache(sender, instance, **kwargs):
+    """
+    Invalidates the academy's cached kiosk roster when its members
+    or courses change.
+    """
+    invalidate_kiosk(instance.aca_id)
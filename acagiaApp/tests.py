@@ -1,3 +1,305 @@
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from datetime import date, datetime, time
+from unittest import mock
+from users.models import CustomUser as User
+from acagiaApp.models import Academy, Attendance, Course, Member, Rank, \
+    MemberRank, MemberPayment, PaymentTerm
+from acagiaApp.forms import CheckInForm
+from acagiaApp.views import attendance
+from acagiaApp import importer
 
-# Create your tests here.
+
+def make_academy(username='owner'):
+    """
+    Makes an academy with its owner.
+    """
+    user = User.objects.create_user(username=username,
+                                    email=username + '@example.com',
+                                    password='password')
+    return Academy.objects.create(user=user, aca_name='Test Academy',
+                                  office_phone='555-555-5555',
+                                  location='Test City')
+
+def make_member(academy, first_name='Kim', last_name='Lee'):
+    """
+    Makes a member of the academy.
+    """
+    return Member.objects.create(aca=academy, first_name=first_name,
+                                 last_name=last_name,
+                                 date_of_birth=date(2010, 1, 1), gender='M',
+                                 cell_phone='555-555-5555',
+                                 email='member@example.com',
+                                 member_since=date(2020, 1, 1))
+
+
+class MemberRankDaysTest(TestCase):
+    """
+    Days left and total days follow days attended when saving.
+    """
+    def setUp(self):
+        academy = make_academy()
+        self.member = make_member(academy)
+        rank = Rank.objects.create(aca=academy, rank_order=1, rank='White',
+                                   days_required=16)
+        MemberRank.objects.create(aca=academy, member=self.member, rank=rank,
+                                  days_attended=10, days_left=6,
+                                  total_days=200)
+
+    def assertDays(self, days_attended, days_left, total_days):
+        member_rank = MemberRank.objects.get(member=self.member)
+        self.assertEqual((member_rank.days_attended, member_rank.days_left,
+                          member_rank.total_days),
+                         (days_attended, days_left, total_days))
+
+    def test_increase_after_refresh(self):
+        member_rank = MemberRank.objects.get(member=self.member)
+        MemberRank.add_days(self.member.id, 5)
+        member_rank.refresh_from_db()
+        member_rank.days_attended += 1
+        member_rank.save()
+        self.assertDays(16, 0, 206)
+
+    def test_decrease_after_refresh(self):
+        member_rank = MemberRank.objects.get(member=self.member)
+        MemberRank.add_days(self.member.id, 5)
+        member_rank.refresh_from_db()
+        member_rank.days_attended -= 2
+        member_rank.save()
+        self.assertDays(13, 3, 203)
+
+    def test_partial_refresh(self):
+        member_rank = MemberRank.objects.get(member=self.member)
+        MemberRank.add_days(self.member.id, 5)
+        member_rank.refresh_from_db(fields=['days_attended', 'days_left',
+                                            'total_days'])
+        member_rank.days_attended += 1
+        member_rank.save()
+        self.assertDays(16, 0, 206)
+
+    def test_increase_and_decrease(self):
+        member_rank = MemberRank.objects.get(member=self.member)
+        member_rank.days_attended += 3
+        member_rank.save()
+        self.assertDays(13, 3, 203)
+        member_rank.days_attended -= 1
+        member_rank.save()
+        self.assertDays(12, 4, 202)
+
+
+class DashboardQueriesTest(TestCase):
+    """
+    The dashboard runs a fixed number of queries however many members
+    the academy has.
+    """
+    def setUp(self):
+        academy = make_academy()
+        ranks = [Rank.objects.create(aca=academy, rank_order=order,
+                                     rank=name, days_required=16)
+                 for order, name in enumerate(['White', 'Yellow'], 1)]
+        for i in range(10):
+            member = make_member(academy, 'Kim' + str(i))
+            MemberRank.objects.create(aca=academy, member=member,
+                                      rank=ranks[0], days_left=i)
+        self.client.force_login(academy.user)
+        session = self.client.session
+        session['aca_id'] = academy.id
+        session.save()
+        cache.clear()
+
+    def test_cold_dashboard(self):
+        # session, user, academy, member counts, birthday members,
+        # ranks and two promotion lists
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_dashboard(self):
+        self.client.get(reverse('dashboard'))
+        # session, user and academy
+        with self.assertNumQueries(3):
+            self.client.get(reverse('dashboard'))
+
+
+class AttendancePageTest(TestCase):
+    """
+    Keyset pages of the attendance log cover every record once, in order,
+    even when many records share a date and time.
+    """
+    def setUp(self):
+        academy = make_academy()
+        member = make_member(academy)
+        Attendance.objects.bulk_create(
+            [Attendance(aca=academy, member=member,
+                        date_attended=date(2020, 5, day),
+                        time_attended=time(18, i % 2))
+             for day in range(1, 4) for i in range(40)])
+        self.records = Attendance.objects.filter(aca=academy)
+        self.newest_first = list(self.records.order_by(
+            '-date_attended', '-time_attended', '-id'))
+
+    def test_cursor_round_trip(self):
+        record = self.newest_first[0]
+        self.assertEqual(
+            attendance.parse_cursor(attendance.make_cursor(record)),
+            (record.date_attended, record.time_attended, record.id))
+
+    def test_invalid_cursor(self):
+        for cursor in (None, '', 'abc', '2020-05-01_18:00:00',
+                       '2020-13-01_18:00:00_1', '2020-05-01_18:00:00_x'):
+            self.assertIsNone(attendance.parse_cursor(cursor))
+
+    def test_pages_forward(self):
+        seen = []
+        after = None
+        while True:
+            page, has_more = attendance.get_records_page(self.records, after)
+            seen.extend(page)
+            if not has_more:
+                break
+            after = attendance.parse_cursor(attendance.make_cursor(page[-1]))
+        self.assertEqual(seen, self.newest_first)
+
+    def test_pages_backward(self):
+        first, has_more = attendance.get_records_page(self.records)
+        self.assertTrue(has_more)
+        second, has_more = attendance.get_records_page(
+            self.records, attendance.parse_cursor(
+                attendance.make_cursor(first[-1])))
+        # Going back from the second page gives the first page again
+        previous, has_more = attendance.get_records_page(
+            self.records, before=attendance.parse_cursor(
+                attendance.make_cursor(second[0])))
+        self.assertEqual(previous, first)
+        self.assertFalse(has_more)
+
+
+class ImportMembersTest(TestCase):
+    """
+    Members are imported all or nothing, with an error for every invalid
+    row.
+    """
+    HEADER = 'first_name,last_name,date_of_birth,gender,cell_phone,email,' \
+             'address,nth_day,pay_term\n'
+    VALID = 'Kim,Lee,2010-01-01,M,555-555-5555,kim@example.com,,5,Monthly\n'
+
+    def setUp(self):
+        self.academy = make_academy()
+        Rank.objects.create(aca=self.academy, rank_order=1, rank='White',
+                            days_required=16)
+        PaymentTerm.objects.create(aca=self.academy, term_name='Monthly',
+                                   amount=150)
+
+    def import_lines(self, *rows, dry_run=False):
+        lines = (self.HEADER + ''.join(rows)).splitlines(keepends=True)
+        return importer.import_members(self.academy.id, lines, dry_run)
+
+    def test_import(self):
+        num_valid, errors = self.import_lines(
+            self.VALID, self.VALID.replace('Kim,Lee', 'Jo, Park '))
+        self.assertEqual((num_valid, errors), (2, []))
+        member = Member.objects.get(aca=self.academy, first_name='Jo')
+        self.assertEqual((member.normalized_first, member.normalized_last),
+                         ('jo', 'park'))
+        self.assertEqual(member.mem_type, Member.STU)
+        self.assertEqual(MemberRank.objects.filter(
+            aca=self.academy, days_left=16).count(), 2)
+        self.assertEqual(MemberPayment.objects.filter(
+            member__aca=self.academy, pay_status=MemberPayment.UNPAID
+        ).count(), 2)
+
+    def test_invalid_rows(self):
+        num_valid, errors = self.import_lines(
+            self.VALID,
+            self.VALID.replace('kim@example.com', 'not-an-email'),
+            self.VALID.replace('Monthly', 'Weekly'))
+        self.assertEqual(num_valid, 1)
+        self.assertEqual([line for line, error in errors], [3, 4])
+        self.assertIn('email', errors[0][1])
+        self.assertIn('pay_term', errors[1][1])
+        # Nothing is imported when any row is invalid
+        self.assertFalse(Member.objects.filter(aca=self.academy).exists())
+
+    def test_dry_run(self):
+        num_valid, errors = self.import_lines(self.VALID, dry_run=True)
+        self.assertEqual((num_valid, errors), (1, []))
+        self.assertFalse(Member.objects.filter(aca=self.academy).exists())
+
+    def test_not_utf8_upload(self):
+        self.client.force_login(self.academy.user)
+        session = self.client.session
+        session['aca_id'] = self.academy.id
+        session.save()
+        csv_file = SimpleUploadedFile(
+            'members.csv',
+            (self.HEADER + self.VALID.replace('Kim', 'José')).encode(
+                'cp1252'))
+        response = self.client.post(reverse('import_members'),
+                                    {'csv_file': csv_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('csv_file'))
+        self.assertFalse(Member.objects.filter(aca=self.academy).exists())
+
+
+class CourseScheduleTest(TestCase):
+    """
+    Courses are found by weekday and the running or next course is
+    picked by end time.
+    """
+    # A Monday
+    MONDAY = date(2020, 5, 4)
+
+    def setUp(self):
+        self.academy = make_academy()
+        self.kids = Course.objects.create(
+            aca=self.academy, course_name='Kids', course_days='M/W/F',
+            start_time=time(17, 0), end_time=time(17, 50))
+        self.adults = Course.objects.create(
+            aca=self.academy, course_name='Adults', course_days='M/Th',
+            start_time=time(19, 0), end_time=time(20, 0))
+        self.sunday = Course.objects.create(
+            aca=self.academy, course_name='Open Mat', course_days='S',
+            start_time=time(12, 0), end_time=time(14, 0))
+
+    def at(self, hour, minute=0):
+        return datetime.combine(self.MONDAY, time(hour, minute))
+
+    def test_days_to_mask(self):
+        self.assertEqual(Course.days_to_mask('M/W/F'), 0b10101)
+        self.assertEqual(Course.days_to_mask('T/Th'), 0b1010)
+        self.assertEqual(Course.days_to_mask('Sa/S'), 0b1100000)
+        self.assertEqual(Course.days_to_mask(''), 0)
+        self.assertEqual(self.adults.days_mask, 0b1001)
+
+    def test_mask_kept_on_save(self):
+        self.adults.course_days = 'S'
+        self.adults.save()
+        self.assertEqual(Course.objects.get(id=self.adults.id).days_mask,
+                         0b1000000)
+
+    def test_courses_on(self):
+        self.assertEqual(list(Course.find_courses_on(self.academy.id,
+                                                     self.MONDAY)),
+                         [self.kids, self.adults])
+        self.assertEqual(list(Course.find_courses_on(self.academy.id,
+                                                     date(2020, 5, 10))),
+                         [self.sunday])
+
+    def test_current_course(self):
+        find = Course.find_current_course
+        # Before, during and right at the end of the first course
+        self.assertEqual(find(self.academy.id, self.at(9)), self.kids)
+        self.assertEqual(find(self.academy.id, self.at(17, 30)), self.kids)
+        self.assertEqual(find(self.academy.id, self.at(17, 50)), self.adults)
+        # After the last course of the day
+        self.assertIsNone(find(self.academy.id, self.at(20)))
+
+    def test_check_in_form(self):
+        with mock.patch('django.utils.timezone.localtime',
+                        return_value=self.at(18)):
+            form = CheckInForm(aca_id=self.academy.id)
+        self.assertEqual(form.fields['course'].initial, self.adults)
+        self.assertEqual(list(form.fields['course'].queryset),
+                         [self.kids, self.adults])
@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------
+# Name:        thumbnails
+# Purpose:     Generates and caches member photo thumbnails
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Generates member photo thumbnails in named sizes on first request.
+Thumbnails are stored in a content-addressed cache directory, so each
+photo/size pair is generated only once and never goes stale.
+"""
+
+from django.conf import settings
+from acagiaApp import photos
+from PIL import Image, ImageOps
+import hashlib
+import os
+import threading
+
+# Named thumbnail sizes (width, height) in the same ratio as member photos
+SIZES = {
+    'small': (48, 56),
+    'medium': (96, 112),
+    'large': (300, 350),
+}
+
+# Directory to keep generated thumbnails in
+THUMBNAIL_DIR = getattr(settings, 'THUMBNAIL_DIR',
+                        os.path.join(settings.MEDIA_ROOT or '', 'thumbs'))
+
+
+def version(name):
+    """
+    Gets a short version string identifying a photo.
+    :param name: photo's storage name
+    :return: version string
+    """
+    return hashlib.sha1(name.encode()).hexdigest()[:12]
+
+def thumbnail_path(source, size):
+    """
+    Gets the cache path of a thumbnail. The path is derived from the
+    source file's name, modification time and the thumbnail size.
+    :param source: source image path
+    :param size: thumbnail size name
+    :return: thumbnail path
+    """
+    mtime = os.stat(source).st_mtime_ns
+    key = hashlib.sha1(
+        f'{source}:{mtime}:{SIZES[size]}'.encode()).hexdigest()
+    ext = photos.EXTENSIONS[photos.output_format()]
+    return os.path.join(THUMBNAIL_DIR, key[:2], key + ext)
+
+def get_thumbnail(source, size):
+    """
+    Gets a thumbnail of the source image, generating it if it isn't
+    cached yet.
+    :param source: source image path
+    :param size: thumbnail size name
+    :return: thumbnail path
+    """
+    path = thumbnail_path(source, size)
+    if not os.path.exists(path):
+        make_thumbnail(source, path, SIZES[size])
+    return path
+
+def make_thumbnail(source, path, size):
+    """
+    Writes a thumbnail of the source image to the given path.
+    :param source: source image path
+    :param path: thumbnail path
+    :param size: (width, height)
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with Image.open(source) as image:
+        # Let the decoder skip pixels that won't be needed
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image, size, Image.LANCZOS)
+    # Write to a temporary file first so no one reads a half-written file
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    photos.save_image(image, tmp_path, photos.output_format())
+    os.replace(tmp_path, path)
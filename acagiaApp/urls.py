@@ -6,6 +6,7 @@ from acagiaApp.views.attendance import *
 from acagiaApp.views.promotion import *
 from acagiaApp.views.events import *
 from acagiaApp.views.payment import *
+from acagiaApp.views.profiling import *
 
 urlpatterns = [
     # ACADEMY
@@ -26,12 +27,16 @@ urlpatterns = [
     #path('members/add-member/', MemberCreateView.as_view(),
     # name='add_member'),
     path('members/add-member/', add_member, name='add_member'),
+    path('members/import/', import_members, name='import_members'),
     path('members/delete-member/<int:pk>/',
          MemberDeleteView.as_view(),
          name='delete_member'),
     path('members/update-member/<int:pk>/', update_member,
          name='update_member'),
     path('members/detail/<int:pk>/', member_detail_view, name='mem_detail'),
+    path('members/photo/<int:pk>/<str:size>/', member_photo,
+         name='mem_photo'),
+    path('members/search/', member_search, name='mem_search'),
 
     # PROMOTION
     path('promotion/<int:within>/', promotion_list, name='promo_list'),
@@ -64,6 +69,9 @@ urlpatterns = [
     path('checkin/', check_in, name='check_in'),
     path('checkin/success/', check_in_success,
          name='checkin_success'),
+    path('checkin/kiosk/', kiosk, name='kiosk'),
+    path('checkin/kiosk/roster/', kiosk_roster, name='kiosk_roster'),
+    path('checkin/kiosk/check-in/', kiosk_check_in, name='kiosk_check_in'),
 
     # ATTENDANCE
     path('attendance/', attendance_by_date, name='att_by_date'),
@@ -98,6 +106,10 @@ urlpatterns = [
          name='update_att'),
     path('settings/att/add-record/', AttendanceCreateView.as_view(),
          name='add_att'),
+    path('settings/att/export/<str:file_format>/', export_attendance,
+         name='export_att'),
     # Manage event records
     path('settings/events/', EventListView.as_view(), name='set_evt_list'),
+    # SQL profiles of recent requests (staff only)
+    path('settings/profiling/', query_profile, name='query_profile'),
 ]
@@ -1,26 +1,47 @@
-from datetime import datetime, timedelta
-from calendar import HTMLCalendar
-from .models import Event
+from datetime import date
+from calendar import HTMLCalendar, monthrange
+from collections import defaultdict
+from django.utils.html import escape
+from .models import Event, Rank
 
 class Calendar(HTMLCalendar):
-    def __init__(self, year=None, month=None):
+    def __init__(self, year=None, month=None, aca_id=None):
         self.year = year
         self.month = month
+        self.aca_id = aca_id
         super(Calendar, self).__init__()
 
+    def get_events_by_day(self):
+        """
+        Gets the academy's events overlapping the month with one query
+        and buckets them by every day of the month they take place on.
+        :return: (dictionary) key:day of month, value:list of events
+        """
+        first = date(self.year, self.month, 1)
+        last = date(self.year, self.month, monthrange(self.year,
+                                                      self.month)[1])
+        events = Event.objects.filter(
+            aca_id=self.aca_id, start_date__lte=last, end_date__gte=first
+        ).order_by('start_date', 'start_time')
+        events_by_day = defaultdict(list)
+        for event in events:
+            # Only days within this month
+            start = max(event.start_date, first).day
+            end = min(event.end_date, last).day
+            for day in range(start, end + 1):
+                events_by_day[day].append(event)
+        return events_by_day
+
     def formatday(self, day, events):
         """
-        Formats a day as a table column and filters events by day.
-        :param day:
-        :param events:
+        Formats a day as a table column with the day's events.
+        :param day: day of month (0 for days outside of the month)
+        :param events: (dictionary) key:day of month, value:list of events
         :return:
         """
-        events_per_day = events.filter(start_time__day=day)
-        d = ''
-        for event in events_per_day:
-            d += f'<li> {event.title} </li>'
-
         if day != 0:
+            d = ''.join(f'<li> {escape(event.title)} </li>'
+                        for event in events.get(day, ()))
             return f'<td><span class="date">{day}</span><ul> {d} </ul></td>'
 
         return '<td></td>'
@@ -32,28 +53,80 @@ class Calendar(HTMLCalendar):
         :param events:
         :return:
         """
-        week = ''
-        for day, weekday in theweek:
-            week += self.formatday(day, events)
+        week = ''.join(self.formatday(day, events) for day, weekday in theweek)
         return f'<tr> {week} </tr>'
 
     def formatmonth(self, withyear=True):
         """
-        Formats a month as a table and filters events by year and month.
+        Formats a month as a table with the academy's events of the month.
         :param withyear:
         :return:
         """
-        events = Event.objects.filter(start_time__year=self.year,
-                                      start_time__month=self.month)
-        e = Event.objects.all().first()
-        print(events, e, e.start_time.year, e.start_time.month, self.year,
-              self.month)
-        cal = f'<table border="0" cellpadding="0" cellspacing="0" class="calendar">\n'
-        cal += f'{self.formatmonthname(self.year, self.month, withyear=withyear)}\n'
-        cal += f'{self.formatweekheader()}\n'
+        events = self.get_events_by_day()
+        cal = [
+            '<table border="0" cellpadding="0" cellspacing="0" '
+            'class="calendar">',
+            self.formatmonthname(self.year, self.month, withyear=withyear),
+            self.formatweekheader()
+        ]
         for week in self.monthdays2calendar(self.year, self.month):
-            cal += f'{self.formatweek(week, events)}\n'
-        return cal
+            cal.append(self.formatweek(week, events))
+        cal.append('</table>')
+        return '\n'.join(cal) + '\n'
+
+
+class RankLadder:
+    """
+    Academy's ranking system loaded once in rank order so that previous and
+    next ranks can be resolved by index instead of a query per member.
+    """
+    def __init__(self, aca_id):
+        self.ranks = list(Rank.objects.filter(aca_id=aca_id).order_by(
+            'rank_order'))
+        # rank id -> position in the ladder
+        self.index = {rank.id: i for i, rank in enumerate(self.ranks)}
+
+    def __len__(self):
+        return len(self.ranks)
 
+    @property
+    def first(self):
+        return self.ranks[0] if self.ranks else None
 
+    @property
+    def last(self):
+        return self.ranks[-1] if self.ranks else None
 
+    def get(self, rank_id):
+        """
+        Finds a rank in the ladder by rank id.
+        :param rank_id: rank id
+        :return: Rank object if found, otherwise, None
+        """
+        i = self.index.get(rank_id)
+        return None if i is None else self.ranks[i]
+
+    def previous(self, rank_id):
+        """
+        Gets the rank right below the given rank.
+        :param rank_id: rank id (None when a member has no rank yet)
+        :return: previous Rank object, None if there's no lower rank
+        """
+        i = self.index.get(rank_id)
+        if not i: # No rank, unknown rank, or already at the first rank
+            return None
+        return self.ranks[i - 1]
+
+    def next(self, rank_id):
+        """
+        Gets the rank right above the given rank.
+        :param rank_id: rank id (None when a member has no rank yet)
+        :return: next Rank object (the first rank for a member without
+                 a rank), None if there's no higher rank
+        """
+        if rank_id is None:
+            return self.first
+        i = self.index.get(rank_id)
+        if i is None or i + 1 >= len(self.ranks):
+            return None
+        return self.ranks[i + 1]
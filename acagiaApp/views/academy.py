@@ -17,11 +17,15 @@ from django.views.generic import CreateView, ListView, UpdateView
 from acagiaApp.forms import AcademyForm
 from acagiaApp.models import Academy, Member, Attendance, Event
 from acagiaApp.views.promotion import get_promo_list
-from acagiaApp.utils import Calendar
+from acagiaApp.utils import Calendar, RankLadder
+from acagiaApp import cache
+from acagiaApp.middleware import get_timezone
 from django.utils import timezone
+from django.db.models import Count, IntegerField, OuterRef, Q, \
+    Subquery
+from django.db.models.functions import Coalesce
 from datetime import date, timedelta
 import calendar
-import pytz
 
 DATE_FORMAT = '%Y-%m-%d'
 TIME_FORMAT = '%H:%M:%S'
@@ -133,7 +137,7 @@ def set_timezone(request, academy):
     """
     if academy.time_zone:
         request.session['django_timezone'] = academy.time_zone
-        timezone.activate(pytz.timezone(academy.time_zone))
+        timezone.activate(get_timezone(academy.time_zone))
     else:
         timezone.deactivate()
 
@@ -159,54 +163,76 @@ def dashboard(request, **kwargs):
         aca_id = request.session['aca_id']
         academy = Academy.objects.get(id=aca_id)
 
-    members = Member.objects.filter(aca_id=aca_id)
-    member_counts = get_member_counts(aca_id, members)
+    # Counts, birthdays and promotion lists are cached until they change
+    today = timezone.localdate()
+    data = cache.get_dashboard(aca_id, today)
+    if data is None:
+        data = get_dashboard_data(aca_id, today)
+        cache.set_dashboard(aca_id, today, data)
+
+    context = {}
+    context['academy'] = academy
+    context['counts'] = data['counts']
+    context['bday_members'] = data['bday_members']
+    context['today'] = timezone.localtime().strftime(DATETIME_FORMAT)
+    context['promo'] = data['promo']
+
+    return render(request, 'acagiaApp/dashboard.html', context)
+
+def get_dashboard_data(aca_id, today):
+    """
+    Gets member counts, birthday members and promotion lists
+    to show on the dashboard.
+    :param aca_id: academy id
+    :param today: academy's local date
+    :return: (dictionary) dashboard information
+    """
+    member_counts = get_member_counts(aca_id)
 
     # Birthday members
-    today = timezone.localdate()
-    bday_members = members.filter(
+    bday_members = list(Member.objects.filter(
+        aca_id=aca_id,
         date_of_birth__month=today.month,
         date_of_birth__day=today.day
-    )
+    ))
     # Birthday in next x days
     # https://stackoverflow.com/questions/6128921/queryset-of-people-with-a
     # -birthday-in-the-next-x-days
     #end_date = today + timedelta(days=7)
 
     # Today's promotion list
-    promo_today = get_promo_list(aca_id, 1)
-    promo_week = get_promo_list(aca_id, 7)
-
-    context = {}
-    context['academy'] = academy
-    context['counts'] = member_counts
-    context['bday_members'] = bday_members
-    context['today'] = timezone.localtime().strftime(DATETIME_FORMAT)
-    context['promo'] = {'today': promo_today, 'week': promo_week,
-                        'today_count': promo_today.count(),
-                        'week_count': promo_week.count()}
+    ladder = RankLadder(aca_id)
+    promo_today = list(get_promo_list(aca_id, 1, ladder))
+    promo_week = list(get_promo_list(aca_id, 7, ladder))
 
-    return render(request, 'acagiaApp/dashboard.html', context)
+    return {'counts': member_counts, 'bday_members': bday_members,
+            'promo': {'today': promo_today, 'week': promo_week,
+                      'today_count': len(promo_today),
+                      'week_count': len(promo_week)}}
 
 
-def get_member_counts(aca_id, members):
+def get_member_counts(aca_id):
     """
-    Gets the number of total, active, inactive, and hold members.
+    Gets the number of total, active, inactive, hold members and
+    members attended today with one query.
     :param aca_id: academy id
-    :param members: member objects
     :return: (dictionary) count information
     """
-    num_of_members = members.count()
-    num_of_active = members.filter(status=Member.ACTIVE).count()
-    num_of_inactive = members.filter(status=Member.INACTIVE).count()
-    num_of_hold = members.filter(status=Member.HOLD).count()
     # Number of attended students today
     today = timezone.localdate()
-    num_of_attended = Attendance.objects.filter(
-        aca_id=aca_id, date_attended=today).count()
-    return {'num_mem': num_of_members, 'num_active': num_of_active,
-                   'num_inactive': num_of_inactive,
-                   'num_hold': num_of_hold, 'num_att': num_of_attended}
+    attended = Attendance.objects.filter(
+        aca_id=OuterRef('id'), date_attended=today
+    ).order_by().values('aca_id').annotate(num=Count('id')).values('num')
+    return Academy.objects.filter(id=aca_id).annotate(
+        num_mem=Count('mem_aca'),
+        num_active=Count('mem_aca',
+                         filter=Q(mem_aca__status=Member.ACTIVE)),
+        num_inactive=Count('mem_aca',
+                           filter=Q(mem_aca__status=Member.INACTIVE)),
+        num_hold=Count('mem_aca', filter=Q(mem_aca__status=Member.HOLD)),
+        num_att=Coalesce(Subquery(attended, output_field=IntegerField()), 0)
+    ).values('num_mem', 'num_active', 'num_inactive', 'num_hold',
+             'num_att').get()
 
 
 @method_decorator(login_required, name='dispatch')
@@ -224,7 +250,7 @@ class CalendarView(ListView):
         d = get_date(self.request.GET.get('month', None))
 
         # Instantiate the calendar class with today's year and date
-        cal = Calendar(d.year, d.month)
+        cal = Calendar(d.year, d.month, self.request.session['aca_id'])
 
         # Call the formatmonth method, which returns the calendar as a table
         html_cal = cal.formatmonth(withyear=True)
@@ -13,13 +13,30 @@ from django.urls import reverse_lazy, reverse
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, ListView, UpdateView, DeleteView
-from acagiaApp.forms import CheckInForm, AttendanceForm, AttendanceDateForm
-from acagiaApp.models import Member, Attendance, MemberRank
+from acagiaApp.forms import CheckInForm, AttendanceForm, AttendanceDateForm, \
+    AttendanceRangeForm
+from acagiaApp.models import Member, Attendance, MemberRank, Course
+from acagiaApp.cache import invalidate_dashboard
+from acagiaApp import cache, export
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_POST
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import Count, Q
+from datetime import date, time
 
 TIME_FORMAT = '%H:%M:%S'
+# Number of records shown per page in the attendance list
+RECORDS_PER_PAGE = 50
+# Number of records read from the database at a time when exporting
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.'
+            'spreadsheetml.sheet',
+}
 
 @login_required
 def check_in(request):
@@ -56,6 +73,8 @@ def check_in(request):
             record.time_attended = timezone.localtime().strftime(TIME_FORMAT)
             form.save()
             increase_days(member.id, 1)
+            # Counters are updated in bulk without signals
+            invalidate_dashboard(aca_id)
             return redirect('/academy/checkin/success/')
     return render(request, 'acagiaApp/checkin_form.html',
                   {'form': form})
@@ -70,30 +89,114 @@ def check_in_success(request, **kwargs):
     """
     return render(request, 'acagiaApp/checkin_success.html')
 
+@login_required
+def kiosk(request):
+    """
+    Displays the check-in kiosk. The kiosk loads the academy's roster and
+    today's courses once and checks in students without reloading.
+    :param request: HTTP request
+    :return: kiosk page
+    """
+    return render(request, 'acagiaApp/checkin_kiosk.html')
+
+def kiosk_roster_etag(request):
+    """
+    Makes an ETag for the kiosk roster from the academy's kiosk version
+    and local date.
+    :param request: HTTP request
+    :return: ETag of the kiosk roster
+    """
+    aca_id = request.session.get('aca_id')
+    return (f'{aca_id}-{cache.get_version(aca_id, "kiosk")}-'
+            f'{timezone.localdate().isoformat()}')
+
+@login_required
+@condition(etag_func=kiosk_roster_etag)
+def kiosk_roster(request):
+    """
+    Gets the academy's members and today's courses for the kiosk.
+    The roster is cached until members or courses change.
+    :param request: HTTP request
+    :return: JSON roster
+    """
+    aca_id = request.session['aca_id']
+    today = timezone.localdate()
+    data = cache.get_kiosk(aca_id, today)
+    if data is None:
+        data = get_kiosk_roster(aca_id, today)
+        cache.set_kiosk(aca_id, today, data)
+    response = JsonResponse(data)
+    # Kiosks must check the ETag before reusing the roster
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def get_kiosk_roster(aca_id, day):
+    """
+    Gets members as [id, first name, last name] and courses on the day
+    as [id, course name, start time, end time].
+    :param aca_id: academy id
+    :param day: academy's local date
+    :return: (dictionary) members and courses
+    """
+    members = list(Member.objects.filter(aca_id=aca_id).order_by(
+        'first_name', 'last_name').values_list(
+        'id', 'first_name', 'last_name'))
+    courses = [
+        [course_id, name, start.strftime('%H:%M'), end.strftime('%H:%M')]
+        for course_id, name, start, end in Course.find_courses_on(
+            aca_id, day).values_list(
+            'id', 'course_name', 'start_time', 'end_time')
+    ]
+    return {'members': members, 'courses': courses}
+
+@login_required
+@require_POST
+def kiosk_check_in(request):
+    """
+    Checks in a member chosen on the kiosk to a course. The attendance
+    record and the member's days are saved in one transaction.
+    :param request: HTTP request with member and course ids
+    :return: JSON with the member's first name, or an error message
+    """
+    aca_id = request.session['aca_id']
+    member_id = request.POST.get('member', '')
+    course_id = request.POST.get('course', '')
+    if not member_id.isdigit() or not course_id.isdigit():
+        return JsonResponse({'error': 'Please select your name and a '
+                                      'class!'}, status=400)
+    first_name = Member.objects.filter(
+        id=member_id, aca_id=aca_id
+    ).values_list('first_name', flat=True).first()
+    if first_name is None or not Course.objects.filter(
+            id=course_id, aca_id=aca_id).exists():
+        return JsonResponse({'error': 'Please check your name and class '
+                                      'and try again!'}, status=400)
+    now = timezone.localtime()
+    with transaction.atomic():
+        Attendance.objects.create(
+            aca_id=aca_id, member_id=member_id, course_id=course_id,
+            date_attended=now.date(), time_attended=now.strftime(TIME_FORMAT)
+        )
+        increase_days(int(member_id), 1)
+    # Counters are updated in bulk without signals
+    invalidate_dashboard(aca_id)
+    return JsonResponse({'name': first_name})
+
 def increase_days(id, credit):
     """
     Increases member's days attended at the current rank by amount of credit.
-    :param id: (Number) member id
+    :param id: (Number) member id or a list of member ids
     :param credit: (Number) credit for attendance
     """
-    # Get the given member's rank object
-    mem_rank = MemberRank.objects.get(member_id=id)
-    mem_rank.days_attended += credit
-    #mem_rank.days_left -= credit
-    #mem_rank.total_days += credit
-    mem_rank.save()
+    MemberRank.add_days(id, credit)
 
 def decrease_days(id, credit):
     """
     Decreases member's days attended at the current rank by amount of credit.
-    :param id: (Number) member id
+    :param id: (Number) member id or a list of member ids
     :param credit: (Number) credit for attendance
     """
-    mem_rank = MemberRank.objects.get(member_id=id)
-    mem_rank.days_attended -= credit
-    #mem_rank.days_left += credit
-    #mem_rank.total_days -= credit
-    mem_rank.save()
+    MemberRank.add_days(id, -credit)
 
 @login_required
 def attendance_by_date(request):
@@ -108,9 +211,8 @@ def attendance_by_date(request):
         form = AttendanceDateForm(request.POST)
         if form.is_valid():
             input_date = form.cleaned_data['date_attended']
-            records = Attendance.objects.filter(aca_id=aca_id,
-                                                date_attended=input_date)
-            num = records.count()
+            records = get_records_by_date(aca_id, input_date)
+            num = len(records)
             day = 'on ' + str(input_date)
             group_attendance(grouped_list, records)
             if not records:
@@ -121,49 +223,206 @@ def attendance_by_date(request):
         form = AttendanceDateForm
         today = timezone.localdate()  # Get today
         # Get today's attendance records
-        records = Attendance.objects.filter(aca_id=aca_id, date_attended=today)
-        num = records.count()
+        records = get_records_by_date(aca_id, today)
+        num = len(records)
         day = 'Today'
         group_attendance(grouped_list, records)
 
     return render(request, template_name, {'form': form, 'records': grouped_list,
                                            'num': num, 'day' : day})
 
+def get_records_by_date(aca_id, day):
+    """
+    Gets attendance records on the given date with their course and member
+    joined in, sorted by course start time.
+    :param aca_id: academy id
+    :param day: date attended
+    :return: (list) attendance records
+    """
+    return list(Attendance.objects.filter(
+        aca_id=aca_id, date_attended=day
+    ).select_related('course', 'member').order_by(
+        'course__start_time', 'course_id', 'time_attended'))
+
 def group_attendance(grouped_list, records):
     """
     Group attendance records by course and sort by course start time.
-    :param records: filtered attendance records by date
+    :param records: attendance records sorted by course start time
     :return: (dictionary) key:course, value:records
     """
     grouped_records = {}
     for record in records:
-        grouped_records[record.course] = []
-    for record in records:
-        grouped_records[record.course].append(record.member)
+        grouped_records.setdefault(record.course, []).append(record.member)
 
     # Separate each course with its attendees and add number of attendees
-    for record in grouped_records:
+    for course, attendees in grouped_records.items():
         sub_dict = {}
-        sub_dict['course'] = record
-        sub_dict['attendees'] = grouped_records[record]
-        sub_dict['count'] = len(grouped_records[record])
+        sub_dict['course'] = course
+        sub_dict['attendees'] = attendees
+        sub_dict['count'] = len(attendees)
         grouped_list.append(sub_dict)
 
 @method_decorator(login_required, name='dispatch')
 class AttendanceListView(ListView):
     """
-    Shows the list of attendance records.
+    Shows the list of attendance records a page at a time, newest first.
+    Pages are found by seeking past the last record shown (keyset
+    pagination) instead of counting rows with OFFSET.
     """
     model = Attendance
     template_name = 'acagiaApp/att_manage_list.html'
 
-    def get_context_data(self, **kwargs):
+    def get_queryset(self):
         aca_id = self.request.session['aca_id']
+        records = Attendance.objects.filter(aca_id=aca_id).select_related(
+            'member', 'course')
+        # Optionally narrow down the records to a date range
+        self.form = AttendanceRangeForm(self.request.GET or None)
+        return filter_by_date_range(records, self.form)
+
+    def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['records'] = Attendance.objects.filter(
-            aca_id=aca_id).order_by('-date_attended', '-time_attended')
+        after = parse_cursor(self.request.GET.get('after'))
+        before = parse_cursor(self.request.GET.get('before'))
+        records, has_more = get_records_page(self.object_list, after, before)
+        # Cursors of the first and last records shown on the page
+        context['prev_cursor'] = None
+        context['next_cursor'] = None
+        if records:
+            if after or (before and has_more):
+                context['prev_cursor'] = make_cursor(records[0])
+            if before or has_more:
+                context['next_cursor'] = make_cursor(records[-1])
+        context['records'] = records
+        context['form'] = self.form
+        # Keep the date range when moving between pages
+        range_query = self.request.GET.copy()
+        range_query.pop('after', None)
+        range_query.pop('before', None)
+        context['range_query'] = range_query.urlencode()
         return context
 
+def filter_by_date_range(records, form):
+    """
+    Narrows down attendance records to the date range given in the form.
+    :param records: attendance records
+    :param form: (AttendanceRangeForm) bound or unbound form
+    :return: filtered attendance records
+    """
+    if form.is_valid():
+        if form.cleaned_data['start_date']:
+            records = records.filter(
+                date_attended__gte=form.cleaned_data['start_date'])
+        if form.cleaned_data['end_date']:
+            records = records.filter(
+                date_attended__lte=form.cleaned_data['end_date'])
+    return records
+
+def get_records_page(records, after=None, before=None):
+    """
+    Gets a page of attendance records ordered from newest to oldest.
+    :param records: attendance records to page through
+    :param after: (date, time, id) to get the records older than
+    :param before: (date, time, id) to get the records newer than
+    :return: (list) records on the page, (bool) whether there are more
+             records beyond the page in the direction of travel
+    """
+    if before:
+        # Seek backwards in ascending order and flip the page afterwards
+        records = records.filter(
+            Q(date_attended__gt=before[0]) |
+            Q(date_attended=before[0], time_attended__gt=before[1]) |
+            Q(date_attended=before[0], time_attended=before[1],
+              id__gt=before[2])
+        ).order_by('date_attended', 'time_attended', 'id')
+    else:
+        if after:
+            records = records.filter(
+                Q(date_attended__lt=after[0]) |
+                Q(date_attended=after[0], time_attended__lt=after[1]) |
+                Q(date_attended=after[0], time_attended=after[1],
+                  id__lt=after[2])
+            )
+        records = records.order_by('-date_attended', '-time_attended', '-id')
+    # Get one more record to tell if there's another page
+    page = list(records[:RECORDS_PER_PAGE + 1])
+    has_more = len(page) > RECORDS_PER_PAGE
+    page = page[:RECORDS_PER_PAGE]
+    if before:
+        page.reverse()
+    return page, has_more
+
+def make_cursor(record):
+    """
+    Makes a page cursor pointing to an attendance record.
+    :param record: attendance record
+    :return: cursor string e.g. 2020-05-03_18:30:00_1234
+    """
+    return record.date_attended.isoformat() + '_' + \
+        record.time_attended.isoformat() + '_' + str(record.id)
+
+def parse_cursor(cursor):
+    """
+    Parses a page cursor made by make_cursor.
+    :param cursor: cursor string
+    :return: (date, time, id) if valid, otherwise, None
+    """
+    if not cursor:
+        return None
+    try:
+        day, at, id = cursor.split('_')
+        return (date.fromisoformat(day), time.fromisoformat(at), int(id))
+    except ValueError:
+        return None
+
+@login_required
+def export_attendance(request, **kwargs):
+    """
+    Streams the academy's attendance history, optionally within a date
+    range, as a CSV or XLSX file. Records are read from the database in
+    chunks, so memory use doesn't grow with the number of records.
+    :param kwargs: keyword arguments including file format (csv or xlsx)
+    :return: streamed file
+    """
+    file_format = kwargs['file_format']
+    if file_format not in EXPORT_TYPES:
+        raise Http404('Unknown file format')
+    aca_id = request.session['aca_id']
+    records = filter_by_date_range(
+        Attendance.objects.filter(aca_id=aca_id),
+        AttendanceRangeForm(request.GET or None))
+    rows = records.order_by(
+        'date_attended', 'time_attended', 'id'
+    ).values_list(
+        'date_attended', 'time_attended', 'member__first_name',
+        'member__last_name', 'course__course_name', 'course__start_time',
+        'course__end_time'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    header = ['Date', 'Time', 'Member', 'Class', 'Class Time']
+    rows = (format_export_row(*row) for row in rows)
+    if file_format == 'csv':
+        chunks = export.csv_chunks(header, rows)
+    else:
+        chunks = export.xlsx_chunks(header, rows)
+    response = StreamingHttpResponse(chunks,
+                                     content_type=EXPORT_TYPES[file_format])
+    response['Content-Disposition'] = \
+        'attachment; filename="attendance.' + file_format + '"'
+    return response
+
+def format_export_row(day, at, first_name, last_name, course_name,
+                      course_start, course_end):
+    """
+    Formats an attendance record's values as a row of the exported file.
+    :return: (list) date, time, member name, class name, class time
+    """
+    course_time = ''
+    if course_start: # Class may have been deleted
+        course_time = course_start.strftime('%H:%M') + ' - ' + \
+                      course_end.strftime('%H:%M')
+    return [day.isoformat(), at.strftime(TIME_FORMAT),
+            first_name + ' ' + last_name, course_name or '', course_time]
+
 @method_decorator(login_required, name='dispatch')
 class AttendanceDeleteView(DeleteView):
     """
@@ -15,8 +15,10 @@ from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, ListView, UpdateView, DeleteView
 from acagiaApp.forms import EventForm, AttendanceDateForm
 from acagiaApp.models import Event, Member, MemberEvent
+from acagiaApp.cache import invalidate_dashboard
 from django.contrib import messages
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 from .attendance import increase_days, decrease_days
 import pytz
@@ -166,30 +168,34 @@ def add_members_to_event(request, **kwargs):
     event_id = kwargs['pk']
     template_name = 'acagiaApp/event_add_members.html'
 
-    # Get clicked event
+    # Get clicked event. Members not added to the event yet are loaded
+    # from the member search as the user types.
     event = Event.objects.get(id=event_id)
-    # https://stackoverflow.com/questions/4523282/django-in-not-in-query
-    # Get all members in the academy
-    all_members = Member.objects.filter(aca_id=aca_id)
-    # Get members not added to the event yet in alphabetical order
-    members = all_members.exclude(
-        id__in=MemberEvent.objects.filter(
-            event_id=event.id).values_list('member_id', flat=True)).order_by(
-        'first_name')
 
     if request.method == 'POST':
         error_msg = 'Please select members.'
         # Get all selected members
         selected_ids = request.POST.getlist('members')
+        result = give_credit(selected_ids, event.credit, event.id, aca_id)
 
-        # Successful process will redirect to event detail page
-        if give_credit(selected_ids, event.credit, event.id):
-            # https://docs.djangoproject.com/en/3.0/ref/urlresolvers/
-            return redirect(reverse('event_detail', kwargs={'pk': event.id}))
-        else:
+        if result is None:
             messages.error(request, error_msg)
+        else:
+            credited_ids, skipped_ids = result
+            if skipped_ids:
+                names = ', '.join(str(member) for member in
+                                  Member.objects.filter(id__in=skipped_ids))
+                messages.warning(request, 'Skipped members already credited '
+                                          'for the event: ' + names)
+            # Successful process will redirect to event detail page
+            if credited_ids:
+                invalidate_dashboard(aca_id)
+                # https://docs.djangoproject.com/en/3.0/ref/urlresolvers/
+                return redirect(reverse('event_detail',
+                                        kwargs={'pk': event.id}))
+            messages.error(request, 'No members were given credit.')
 
-    return render(request, template_name, {'members': members, 'event': event})
+    return render(request, template_name, {'event': event})
 
 @login_required
 def event_detail_view(request, **kwargs):
@@ -217,32 +223,47 @@ def event_member_delete(request, **kwargs):
     mem_event = MemberEvent.objects.get(event_id=event_id, member_id=mem_id)
     decrease_days(mem_id, mem_event.event.credit)
     mem_event.delete()
+    invalidate_dashboard(request.session['aca_id'])
     return redirect(reverse('event_detail', kwargs={'pk': event_id}))
 
-def give_credit(member_ids, credit, event_id):
+def give_credit(member_ids, credit, event_id, aca_id):
     """
     Gives attendance credit to a list of members and
-    saves member/event info to MemberEvent table.
+    saves member/event info to MemberEvent table in one transaction.
+    Members already credited for the event are skipped.
     :param member_ids: a list of member ids
     :param credit: attendance credit
-    :return: true if giving credit was done successfully, otherwise, false
-    """
-    if not member_ids or not validate_number(credit):
-        return False
-    # Give credit to each selected member
-    for id in member_ids:
-        increase_days(id, int(credit))
-        save_member_event(id, event_id)
-    return True
-
-def save_member_event(member_id, event_id):
-    """
-    Saves member and event information to MemberEvent table.
-    :param member_id: member id
     :param event_id: event id
+    :param aca_id: academy id
+    :return: (credited member ids, skipped member ids) if member ids and
+             credit are valid, otherwise, None
     """
-    mem_event = MemberEvent(member_id=member_id, event_id=event_id)
-    mem_event.save()
+    if not member_ids or not validate_number(credit) or \
+            not all(str(id).isdecimal() for id in member_ids):
+        return None
+    member_ids = {int(id) for id in member_ids}
+    with transaction.atomic():
+        # Lock the event so that concurrent submits can't both credit
+        # the same member
+        if not Event.objects.select_for_update().filter(
+                id=event_id, aca_id=aca_id).exists():
+            return None
+        # Only the academy's members can be credited
+        member_ids = set(Member.objects.filter(
+            aca_id=aca_id, id__in=member_ids).values_list('id', flat=True))
+        if not member_ids:
+            return None
+        # Members who already got credit for the event
+        credited_ids = MemberEvent.objects.filter(
+            event_id=event_id, member_id__in=member_ids
+        ).values_list('member_id', flat=True)
+        skipped_ids = sorted(credited_ids)
+        new_ids = sorted(member_ids.difference(skipped_ids))
+        MemberEvent.objects.bulk_create(
+            [MemberEvent(member_id=id, event_id=event_id) for id in new_ids]
+        )
+        increase_days(new_ids, int(credit))
+    return new_ids, skipped_ids
 
 def validate_number(num):
     """
@@ -15,39 +15,91 @@ from django.contrib.auth import get_user_model
 from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, UpdateView, DeleteView
 from acagiaApp.forms import MemberForm, MemberUpdateForm, \
-    MemberPaymentAddForm, MemberPaymentUpdateForm
+    MemberPaymentAddForm, MemberPaymentUpdateForm, MemberImportForm, \
+    MemberSearchForm
 from acagiaApp.models import Member, MemberRank, PaymentTerm, MemberPayment,\
-    Rank
+    Rank, MemberEvent
 from django.utils import timezone
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from acagiaApp import cache, importer, thumbnails
+import csv
+import hashlib
+import io
+
+# Number of members shown per page in the member list
+MEMBERS_PER_PAGE = 50
+# Number of members returned by a member search by default and at most
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+# Seconds browsers may keep a member photo thumbnail
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 365
 
 @login_required
 def member_list(request):
     """
-    Shows the list of members in the academy with basic information.
+    Shows the list of members in the academy with basic information,
+    a page at a time. Members can be searched by name, email or phone
+    and filtered by status and member type.
     :param request: HTTP request
-    :param kwargs: keyword arguments including academy id
     :return: member list page
     """
     aca_id = request.session['aca_id']
     # If no payment system is made, redirect the user to make one
-    if not PaymentTerm.objects.filter(aca_id=aca_id):
+    if not PaymentTerm.objects.filter(aca_id=aca_id).exists():
         messages.info(request, 'Make your payment system first to use '
                                'MEMBER tab now!')
         return redirect('/academy/pay-sys/')
     # If no rank system is made, redirect the user to make one
-    if not Rank.objects.filter(aca_id=aca_id):
+    if not Rank.objects.filter(aca_id=aca_id).exists():
         messages.info(request, 'Make your ranking system first to use '
                                'PROMOTION tab now!')
         return redirect('/academy/rank-sys/')
 
-    # Get current academy's members
+    # Get current academy's members with only the columns shown
     member_list = Member.objects.filter(
         aca_id=aca_id
-    ).order_by('first_name')
+    ).select_related('mr_mem__rank').only(
+        'id', 'first_name', 'last_name', 'date_of_birth', 'gender',
+        'status', 'mem_type', 'mr_mem__id', 'mr_mem__member',
+        'mr_mem__rank', 'mr_mem__rank__rank'
+    ).order_by('first_name', 'last_name', 'id')
+
+    form = MemberSearchForm(request.GET or None)
+    if form.is_valid():
+        member_list = search_members(member_list, form.cleaned_data)
+
+    paginator = Paginator(member_list, MEMBERS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    # Keep the search when moving between pages
+    search_query = request.GET.copy()
+    search_query.pop('page', None)
 
     return render(request, 'acagiaApp/member_list.html',
-                  {'members': member_list})
+                  {'members': page, 'form': form,
+                   'search_query': search_query.urlencode()})
+
+def search_members(members, search):
+    """
+    Filters members by search words and status/member type.
+    Every word must match the first name, last name, email or phone.
+    :param members: members to search
+    :param search: (dictionary) cleaned data of MemberSearchForm
+    :return: filtered members
+    """
+    for word in search['q'].split():
+        members = members.filter(
+            Q(first_name__icontains=word) | Q(last_name__icontains=word) |
+            Q(email__icontains=word) | Q(cell_phone__icontains=word))
+    if search['status']:
+        members = members.filter(status=search['status'])
+    if search['mem_type']:
+        members = members.filter(mem_type=search['mem_type'])
+    return members
 
 '''
 @method_decorator(login_required, name='dispatch')
@@ -97,7 +149,6 @@ def add_member(request):
             member = form.save(commit=False)
             member.aca_id = aca_id
             member.member_since = timezone.localdate()
-            print(member.img)
             member.save()
             # Give a default rank to a member
             default_rank = Rank.objects.filter(aca_id=aca_id).order_by(
@@ -117,6 +168,44 @@ def add_member(request):
         pay_form, 'template': template})
 
 
+@login_required
+def import_members(request):
+    """
+    Imports members from an uploaded CSV file. A dry run only shows
+    which rows are invalid.
+    """
+    aca_id = request.session['aca_id']
+    template_name = 'acagiaApp/member_import.html'
+    form = MemberImportForm()
+    errors = []
+    if request.method == 'POST':
+        form = MemberImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            dry_run = form.cleaned_data['dry_run']
+            lines = io.TextIOWrapper(form.cleaned_data['csv_file'].file,
+                                     encoding='utf-8-sig', newline='')
+            try:
+                num_valid, errors = importer.import_members(aca_id, lines,
+                                                            dry_run)
+            except (UnicodeDecodeError, csv.Error) as e:
+                # e.g. saved by Excel as "CSV" instead of "CSV UTF-8"
+                form.add_error('csv_file', 'Can\'t read the file as a '
+                                           'UTF-8 CSV file (' + str(e) + ')')
+                return render(request, template_name,
+                              {'form': form, 'errors': errors})
+            if errors:
+                messages.error(request, str(len(errors)) + ' invalid rows, '
+                                        'nothing imported.')
+            elif dry_run:
+                messages.success(request, 'All ' + str(num_valid) +
+                                 ' rows are valid. Uncheck dry run to '
+                                 'import them.')
+            else:
+                messages.success(request, str(num_valid) +
+                                 ' members imported successfully.')
+                return redirect(reverse('mem_list'))
+    return render(request, template_name, {'form': form, 'errors': errors})
+
 @method_decorator(login_required, name='dispatch')
 class MemberDeleteView(DeleteView):
     """
@@ -193,4 +282,101 @@ def member_detail_view(request, **kwargs):
     :return:
     """
     member = Member.find_member_by_id(mem_id=kwargs['pk'])
-    return render(request, 'acagiaApp/member_detail.html', {'member': member})
\ No newline at end of file
+    return render(request, 'acagiaApp/member_detail.html', {'member': member})
+
+@login_required
+def member_photo(request, **kwargs):
+    """
+    Serves a member's photo in the requested thumbnail size.
+    Thumbnails are generated on first request and cached on disk.
+    :param kwargs: keyword arguments including member id and size name
+    :return: thumbnail image
+    """
+    size = kwargs['size']
+    if size not in thumbnails.SIZES:
+        raise Http404('Unknown photo size')
+    member = get_object_or_404(Member.objects.only('img', 'img_ready'),
+                               id=kwargs['pk'],
+                               aca_id=request.session['aca_id'])
+    storage = Member._meta.get_field('img').storage
+    try:
+        path = thumbnails.get_thumbnail(storage.path(member.photo_name),
+                                        size)
+    except OSError:
+        raise Http404('Photo not found')
+    response = FileResponse(open(path, 'rb'))
+    # Urls carry the photo version, so browsers can keep them for a year
+    patch_cache_control(response, private=True, max_age=THUMBNAIL_MAX_AGE,
+                        immutable=True)
+    return response
+
+def name_prefix(field, prefix):
+    """
+    Matches names starting with the prefix as a range, which the
+    academy's normalized name indexes can seek (LIKE can't use them).
+    :param field: normalized name field
+    :param prefix: normalized name prefix
+    :return: Q object
+    """
+    return Q(**{field + '__gte': prefix, field + '__lt': prefix + '\uffff'})
+
+def member_search_etag(request):
+    """
+    Makes an ETag for a member search. Search results only change when
+    the academy's members or event attendees change, which bumps the
+    academy's cache version.
+    :param request: HTTP request
+    :return: ETag of the search results
+    """
+    aca_id = request.session.get('aca_id')
+    key = f'{aca_id}:{cache.get_version(aca_id)}:{request.GET.urlencode()}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+@login_required
+@condition(etag_func=member_search_etag)
+def member_search(request):
+    """
+    Finds members whose first or last name starts with the searched name,
+    for member pickers that load members as the user types.
+    Query parameters are q (name), status, limit and event (to leave out
+    members already added to the event).
+    :param request: HTTP request
+    :return: JSON list of found members
+    """
+    aca_id = request.session['aca_id']
+    words = request.GET.get('q', '').split()
+    try:
+        limit = min(int(request.GET.get('limit', SEARCH_LIMIT)),
+                    MAX_SEARCH_LIMIT)
+    except ValueError:
+        limit = SEARCH_LIMIT
+
+    results = []
+    if words and limit > 0:
+        members = Member.objects.filter(aca_id=aca_id).only(
+            'id', 'first_name', 'last_name', 'status', 'img', 'img_ready')
+        if len(words) == 1:
+            name = Member.normalize_name(words[0])
+            members = members.filter(name_prefix('normalized_first', name) |
+                                     name_prefix('normalized_last', name))
+        else:
+            members = members.filter(
+                name_prefix('normalized_first',
+                            Member.normalize_name(words[0])),
+                name_prefix('normalized_last',
+                            Member.normalize_name(''.join(words[1:]))))
+        if request.GET.get('status'):
+            members = members.filter(status=request.GET['status'])
+        if request.GET.get('event', '').isdigit():
+            members = members.exclude(id__in=MemberEvent.objects.filter(
+                event_id=request.GET['event']).values('member_id'))
+        members = members.order_by('normalized_first', 'normalized_last',
+                                   'id')[:limit]
+        results = [{'id': member.id, 'name': str(member),
+                    'status': member.status,
+                    'photo': member.small_photo_url} for member in members]
+
+    response = JsonResponse({'members': results})
+    # Browsers must check the ETag before reusing results
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,33 @@
+# ----------------------------------------------------------------------
+# Name:        profiling
+# Purpose:     Shows per-request SQL profiles to staff
+#
+# Date:        10/18/2026
+# ----------------------------------------------------------------------
+"""
+Shows the latest request profiles written by QueryProfilingMiddleware.
+"""
+
+from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from acagiaApp.middleware import PROFILE_LOG
+from collections import deque
+import json
+
+# Number of latest requests shown
+NUM_PROFILES = 100
+
+@staff_member_required
+def query_profile(request):
+    """
+    Shows the latest profiled requests, the ones with most queries first.
+    """
+    try:
+        with open(PROFILE_LOG) as f:
+            lines = deque(f, maxlen=NUM_PROFILES)
+    except FileNotFoundError:
+        lines = []
+    profiles = [json.loads(line) for line in lines if line.strip()]
+    profiles.sort(key=lambda profile: profile['num_queries'], reverse=True)
+    return render(request, 'acagiaApp/query_profile.html',
+                  {'profiles': profiles})
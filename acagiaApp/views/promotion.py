@@ -15,8 +15,10 @@ from django.utils.decorators import method_decorator
 from django.views.generic import ListView, UpdateView, DeleteView
 from acagiaApp.forms import RankFormset, RankForm, MemberRankForm
 from acagiaApp.models import Academy, Rank, MemberRank
+from acagiaApp.utils import RankLadder
+from acagiaApp.cache import invalidate_dashboard
 from django.contrib import messages
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
 @login_required
 def add_rank(request):
@@ -120,21 +122,26 @@ class RankSystemListView(ListView):
             id=aca_id)
         return context
 
-def get_promo_list(aca_id, within):
+def get_promo_list(aca_id, within, ladder=None):
     """
     Gets the promotion list within given days.
     :param aca_id: academy id
     :param within: days to search members (0:all members)
+    :param ladder: (RankLadder) academy's ranks, loaded if not given
     :return:
     """
+    # Member and rank are shown with every row, so join them up front
+    members = MemberRank.objects.filter(aca_id=aca_id).select_related(
+        'member', 'rank')
     if within == 0: # All members
-        return MemberRank.objects.filter(aca_id=aca_id).order_by('days_left', 'member__first_name')
+        return members.order_by('days_left', 'member__first_name')
 
-    last_rank = Rank.objects.filter(aca_id=aca_id).order_by('rank_order').last()
-    promo_list = MemberRank.objects.filter(
-        aca_id=aca_id, days_left__lte=within
-        ).exclude(rank=last_rank
-        ).order_by('days_left', 'member__first_name')
+    if ladder is None:
+        ladder = RankLadder(aca_id)
+    promo_list = members.filter(days_left__lte=within).order_by(
+        'days_left', 'member__first_name')
+    if ladder.last:
+        promo_list = promo_list.exclude(rank_id=ladder.last.id)
 
     if within > 1:
         promo_list = promo_list.filter(days_left__gt=1)
@@ -147,84 +154,59 @@ def promotion_list(request, **kwargs):
     within = kwargs.get('within')
     template_name = 'acagiaApp/promotion_list.html'
 
-    # Get list of members to show on the promotion list
-    members = get_promo_list(aca_id, within)
-
     # Get all ranks in order
-    all_ranks = Rank.objects.filter(aca_id=aca_id).order_by('rank_order')
+    ladder = RankLadder(aca_id)
     # If no rank system is made, sends an error message and
     # redirect the user to make one.
-    if not all_ranks:
+    if not ladder:
         messages.info(request, 'Make your ranking system first to use '
                                'PROMOTION tab now!')
         return redirect('/academy/rank-sys/')
-    first_rank = all_ranks.first() # Get the first rank in the ranking system
-    last_rank = all_ranks.last() # Get the last rank in the ranking system
+
+    # Get list of members to show on the promotion list
+    members = get_promo_list(aca_id, within, ladder)
+
+    # When promote button clicked
+    if request.method == 'POST' and 'promote_btn' in request.POST:
+        promote_demote(request, 'promote', members, ladder)
+        return redirect('/academy/promotion/' + str(within) +'/')
+
+    # When demote button clicked
+    if request.method == 'POST' and 'demote_btn' in request.POST:
+        promote_demote(request, 'demote', members, ladder)
+        return redirect('/academy/promotion/' + str(within) + '/')
+
     promotion_list = [] # All members' promotion info
     # Go through each member and set pre/current/next rank and days left
     for member in members:
-        if not member.rank: # Member isn't assigned a rank yet
+        current = ladder.get(member.rank_id)
+        if current is None: # Member isn't assigned a rank yet
             pre = 'X'
             current = 'New Member'
-            next = first_rank
+            next = ladder.first
         else: # Member is currently associated with a rank
-            current = member.rank # Get the current rank
-            '''
-            If member isn't at his first rank, previous rank will be the 
-            rank in the order that is the last smaller rank than the current 
-            rank's order.
-            If member isn't at his last rank, next rank will be the rank
-            in the order that is the smallest larger rank than the current 
-            rank's order. 
-            '''
-            # when there's only 1 rank
-            if current == first_rank and current == last_rank:
-                pre = ''
-                next = ''
-            elif current == first_rank: # Member is at first rank
-                pre = ''
-                next = all_ranks.filter(
-                    rank_order__gt=member.rank.rank_order).first()
-            elif current == last_rank: # Member is at last rank
-                pre = all_ranks.filter(
-                    rank_order__lt=member.rank.rank_order).last()
-                next = ''
-            else:
-                pre = all_ranks.filter(
-                    rank_order__lt=member.rank.rank_order).last()
-                next = all_ranks.filter(
-                    rank_order__gt=member.rank.rank_order).first()
+            # Empty string is shown when there's no lower/higher rank
+            pre = ladder.previous(current.id) or ''
+            next = ladder.next(current.id) or ''
 
         if current == 'New Member' or next == '':
             member.days_left = ''
-        else:
-            member.days_left = member.days_left
         # if current is set to X, calculate days left with 0
         mem_rank = {'id': member.id, 'name': member.member, 'pre': pre,
                     'current': current, 'next': next, 'days_left':
-                        member.days_left, 'photo': member.member.img
+                        member.days_left, 'photo': member.member.medium_photo_url
                     }
         promotion_list.append(mem_rank) # Append to list of all members
 
-    # When promote button clicked
-    if request.method == 'POST' and 'promote_btn' in request.POST:
-        promote_demote(request, 'promote', members, all_ranks)
-        return redirect('/academy/promotion/' + str(within) +'/')
-
-    # When demote button clicked
-    if request.method == 'POST' and 'demote_btn' in request.POST:
-        promote_demote(request, 'demote', members, all_ranks)
-        return redirect('/academy/promotion/' + str(within) + '/')
-
     return render(request, template_name, {'prom_list': promotion_list})
 
-def promote_demote(request, operation, members, ranks):
+def promote_demote(request, operation, members, ladder):
     """
     Handles promotion and demotion of selected members.
     :param request: HTTP request
     :param operation: (string) indicates either promote or demote
     :param members: (MemberRank) members in the academy
-    :param ranks: (Rank) all ranks used in the academy
+    :param ladder: (RankLadder) all ranks used in the academy
     """
     # Messages to send to the user
     error_msg = 'You didn\'t select any members! Please select members first.'
@@ -241,38 +223,24 @@ def promote_demote(request, operation, members, ranks):
         messages.error(request, error_msg)
         return
 
-    # For each id, find the member and promote.
-    for id in selected_ids:
-        member = members.get(id=id)
-        next = None
-        pre = None
+    # Group selected members by the rank they are moving to
+    rank_changes = {}
+    for member in members.filter(id__in=selected_ids):
         # Get pre or next rank
-        if not member.rank:  # Member isn't assigned a rank yet
-            if operation == 'promote':
-                next = ranks.first() # next rank will be the first rank
+        if operation == 'promote':
+            new_rank = ladder.next(member.rank_id)
         else:
-            if operation == 'demote':
-                pre = ranks.filter(rank_order__lt=member.rank.rank_order).last()
-            else:
-                next = ranks.filter(rank_order__gt=member.rank.rank_order).first()
-        # No more higher rank to promote?
-        if operation == 'promote' and not next:
+            new_rank = ladder.previous(member.rank_id)
+        # No more higher rank to promote or lower rank to demote?
+        if not new_rank:
             # Set error msg indicating who's failed and decrease # of success
             fail_msg += str(member.member) + ', '
             num_fail += 1
-        # No more lower rank to demote?
-        elif operation == 'demote' and not pre:
-            fail_msg += str(member.member) + ', '
-            num_fail += 1
         else: # Assign correct rank
             success_msg += str(member.member) + ', '
-            if operation == 'promote':
-                member.rank = next
-            else:
-                member.rank = pre
+            rank_changes.setdefault(new_rank, []).append(member.id)
             num_success += 1
-            #reset_days(member)
-            member.save()
+    change_ranks(rank_changes)
 
     # Send successful message if 1 or more members are promoted
     if num_success > 0:
@@ -291,6 +259,20 @@ def reset_days(member):
     member.days_attended = 0
     member.days_left = member.rank.days_required
 
+def change_ranks(rank_changes):
+    """
+    Moves members to new ranks with one UPDATE per new rank in a single
+    transaction. Days are reset the same way as reset_days does, since
+    bulk updates don't go through the pre_save/post_save signals.
+    :param rank_changes: (dictionary) key:new Rank, value:MemberRank ids
+    """
+    with transaction.atomic():
+        for rank, ids in rank_changes.items():
+            MemberRank.objects.filter(id__in=ids).update(
+                rank=rank, days_attended=0, days_left=rank.days_required)
+    for aca_id in {rank.aca_id for rank in rank_changes}:
+        invalidate_dashboard(aca_id)
+
 @method_decorator(login_required, name='dispatch')
 class MemberRankUpdateView(UpdateView):
     """